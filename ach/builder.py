@@ -1,10 +1,22 @@
+import copy
+import io
 import math
+import multiprocessing
 from datetime import datetime, timedelta
 
 from .data_types import (
     Header, FileControl, BatchHeader,
-    BatchControl, EntryDetail, AddendaRecord
+    BatchControl, EntryDetail, AddendaRecord, Ach, AchError,
+    CREDIT_TRANSACTION_CODES, DEBIT_TRANSACTION_CODES
 )
+from .parser import RECORD_SIZE, StreamParser, record_stride
+from .routing import check_digit, check_digits, verify_routing_numbers
+from .template import RowTemplate, as_list
+from .validation import ENTRY_FIELDS, failed_rows, validate_entry_columns
+
+
+# Rows of 9s pad the file out to a multiple of 10 rows
+NINES_ROW = '9' * 94
 
 
 class AchFile(object):
@@ -14,13 +26,20 @@ class AchFile(object):
 
     """
 
-    def __init__(self, file_id_mod, settings):
+    # Number of rows write_to renders before each write
+    WRITE_CHUNK_ROWS = 1000
+
+    def __init__(self, file_id_mod, settings, entry_class=EntryDetail):
         """
         The file_id_mod should be 'A' for the first of the day, 'B'
         for the second and so on.
+
+        entry_class is the record class the entries are built as,
+        CompactEntryDetail for example to build them with __slots__.
         """
 
         self.settings = settings
+        self.entry_class = entry_class
 
         try:
             self.header = Header(
@@ -35,20 +54,104 @@ class AchFile(object):
             )
 
         self.batches = list()
+        self.batch_contexts = {}
+        self.totals = ControlTotals()
+        self.update_control()
 
     def add_batch(self, std_ent_cls_code, batch_entries=None,
                   credits=True, debits=False, eff_ent_date=None,
-                  company_id=None):
+                  company_id=None, stream=False, verify_routing=False):
         """
         Use this to add batches to the file. For valid std_ent_cls_codes see:
         http://en.wikipedia.org/wiki/Automated_Clearing_House#SEC_codes
+
+        With verify_routing=True, the check digit of every 9 digit routing
+        number is verified and AchError lists all the entries that fail.
+
+        With stream=True, batch_entries can be any iterable (a DB cursor, a
+        CSV reader...). Entries are only built as the file is rendered and
+        their totals are added to the file control afterwards, so such a
+        file can be rendered only once.
         """
         if batch_entries is None:
             batch_entries = list()
 
-        entry_desc = self.get_entry_desc(std_ent_cls_code)
+        context = self.get_batch_context(std_ent_cls_code, company_id)
+        batch_header = self.get_batch_header(
+            context, credits, debits, eff_ent_date
+        )
+
+        if verify_routing and not stream:
+            batch_entries = list(batch_entries)
+            self.verify_routing_numbers(batch_entries)
+
+        entries = self.build_entries(
+            context, batch_entries, verify_routing and stream
+        )
+
+        if stream:
+            # Entry lists can also be built and rendered by render_parallel
+            if isinstance(batch_entries, (list, tuple)):
+                source = (context, batch_entries, verify_routing)
+            else:
+                source = None
+
+            self.batches.append(
+                StreamingFileBatch(batch_header, entries, source)
+            )
+            return
+
+        batch = FileBatch(batch_header, entries)
+
+        self.batches.append(batch)
+        self.totals.add(batch.batch_control)
+        self.update_control()
+
+    def add_column_batch(self, std_ent_cls_code, columns, credits=True,
+                         debits=False, eff_ent_date=None, company_id=None):
+        """
+        Adds a batch given as columns rather than entry dicts. `columns` is
+        a dict of the keys of an entry dict ('type', 'routing_number',
+        'account_number', 'amount' and 'name') to lists or NumPy arrays with
+        one value per entry.
+
+        All the columns are validated at once and AchError lists every
+        failing entry. The entry rows are rendered from the row template of
+        the SEC code without building a record per entry, so the batch has
+        no `entries` and its entries cannot have addenda.
+        """
+        missing = [key for key, field in ENTRY_FIELDS if key not in columns]
+
+        if missing:
+            raise AchError('Columns require: %s' % ', '.join(missing))
 
-        batch_count = len(self.batches) + 1
+        if len(set(len(column) for column in columns.values())) > 1:
+            raise AchError('Columns need to be the same length')
+
+        fields, errors = validate_entry_columns(columns, std_ent_cls_code)
+
+        if errors:
+            raise AchError(
+                'invalid fields in entries %s'
+                % ', '.join(str(row) for row in failed_rows(errors))
+            )
+
+        context = self.get_batch_context(std_ent_cls_code, company_id)
+        batch_header = self.get_batch_header(
+            context, credits, debits, eff_ent_date
+        )
+
+        batch = ColumnBatch(batch_header, context, fields)
+
+        self.batches.append(batch)
+        self.totals.add(batch.batch_control)
+        self.update_control()
+
+    def get_batch_header(self, context, credits, debits, eff_ent_date):
+        """
+        Returns the batch header of the next batch of the file
+        """
+        batch_count = self.get_next_batch_id()
 
         if not eff_ent_date:
             eff_ent_date = datetime.today() + timedelta(days=1)
@@ -60,59 +163,79 @@ class AchFile(object):
         elif debits:
             serv_cls_code = '225'
 
-        batch_header = BatchHeader(
-            serv_cls_code=serv_cls_code,
-            batch_id=batch_count,
-            company_id=company_id or self.settings['company_id'],
-            std_ent_cls_code=std_ent_cls_code,
-            entry_desc=entry_desc,
-            desc_date='',
-            eff_ent_date=eff_ent_date.strftime('%y%m%d'),  # YYMMDD
-            orig_stat_code='1',
-            orig_dfi_id=self.settings['immediate_dest'][:8],
-            company_name=self.settings['immediate_org_name']
+        return context.get_batch_header(
+            serv_cls_code, batch_count, eff_ent_date.strftime('%y%m%d')  # YYMMDD
         )
 
-        entries = list()
-        entry_counter = 1
-
-        for record in batch_entries:
+    def get_next_batch_id(self):
 
-            entry = EntryDetail(std_ent_cls_code)
+        return len(self.batches) + 1
 
-            entry.transaction_code = record.get('type')
-            entry.recv_dfi_id = record.get('routing_number')
+    def verify_routing_numbers(self, batch_entries):
+        """
+        Verifies the check digits of all the 9 digit routing numbers of a
+        batch at once and raises AchError with the index of every entry
+        that fails. 8 digit routing numbers have no check digit to verify.
+        """
+        indexes = [
+            index for index, record in enumerate(batch_entries)
+            if len(record['routing_number']) >= 9
+        ]
+        routing_numbers = [
+            batch_entries[index]['routing_number'] for index in indexes
+        ]
+
+        errors = verify_routing_numbers(routing_numbers)
+
+        if errors:
+            raise AchError(
+                "invalid routing number check digit in entries %s"
+                % ', '.join(str(indexes[error]) for error in errors)
+            )
 
-            if len(record['routing_number']) < 9:
-                entry.calc_check_digit()
-            else:
-                entry.check_digit = record['routing_number'][8]
+    def get_batch_context(self, std_ent_cls_code, company_id=None):
+        """
+        Returns the BatchContext of the SEC code and company, which is
+        built once per file and shared by all their batches
+        """
+        company_id = company_id or self.settings['company_id']
+        key = (std_ent_cls_code, company_id)
 
-            entry.dfi_acnt_num = record['account_number']
-            entry.amount = int(round(float(record['amount']) * 100))
-            entry.ind_name = record['name'].upper()[:22]
-            entry.trace_num = self.settings['immediate_dest'][:8] \
-                + entry.validate_numeric_field(entry_counter, 7)
+        if key not in self.batch_contexts:
+            self.batch_contexts[key] = BatchContext(
+                std_ent_cls_code, self.settings, company_id,
+                self.get_entry_desc(std_ent_cls_code), self.entry_class
+            )
 
-            entries.append((entry, record.get('addenda', [])))
-            entry_counter += 1
+        return self.batch_contexts[key]
 
-        self.batches.append(FileBatch(batch_header, entries))
-        self.set_control()
+    def build_entries(self, context, batch_entries, verify_routing=False):
+        """
+        Yields an (EntryDetail, addenda) tuple for each entry dict
+        """
+        return context.build_entries(batch_entries, verify_routing)
 
     def set_control(self):
+        """
+        Recounts the control totals from `batches` and sets the file
+        control. add_batch keeps the totals up to date as it goes, call
+        this after changing `batches` directly. Streamed batches are counted
+        once they have been rendered.
+        """
+        self.totals = ControlTotals()
+
+        for batch in self.batches:
+            if batch.batch_control is not None:
+                self.totals.add(batch.batch_control)
 
-        batch_count = len(self.batches)
-        block_count = self.get_block_count(self.batches)
-        entry_hash = self.get_entry_hash(self.batches)
-        entadd_count = self.get_entadd_count(self.batches)
-        debit_amount = self.get_debit_amount(self.batches)
-        credit_amount = self.get_credit_amount(self.batches)
+        self.update_control()
 
-        self.control = FileControl(
-            batch_count, block_count, entadd_count,
-            entry_hash, debit_amount, credit_amount
-        )
+    def update_control(self):
+        """
+        Sets the file control from the running totals, which are updated
+        as each batch is added, so this does not walk the batches again
+        """
+        self.control = self.totals.get_file_control()
 
     def get_block_count(self, batches):
 
@@ -171,15 +294,16 @@ class AchFile(object):
         return credit_amount
 
     def get_nines(self, rows, line_ending):
-        nines = ''
 
-        for i in range(rows):
-            nines += '9'*94
-            if i == rows - 1:
-                continue
-            nines += line_ending
+        return line_ending.join([NINES_ROW] * rows)
+
+    def get_nine_lines(self):
+        """
+        Returns how many rows of 9s pad the file to a multiple of 10 rows
+        """
+        lines = self.totals.get_lines()
 
-        return nines
+        return int(round(10 * (math.ceil(lines / 10.0) - (lines / 10.0))))
 
     def get_entry_desc(self, std_ent_cls_code):
 
@@ -192,6 +316,28 @@ class AchFile(object):
 
         return entry_desc
 
+    def get_rows(self):
+        """
+        Yields every row of the file in order, 9 fill included, without
+        line endings
+        """
+        yield self.header.get_row()
+
+        for batch in self.batches:
+            for row in batch.get_rows():
+                yield row
+
+            # Streamed batches only know their totals once rendered
+            if batch.streaming:
+                self.totals.add(batch.batch_control)
+
+        self.update_control()
+
+        yield self.control.get_row()
+
+        for _ in range(self.get_nine_lines()):
+            yield NINES_ROW
+
     def render_to_string(self, force_crlf=False):
         """
         Renders a nacha file as a string
@@ -200,20 +346,566 @@ class AchFile(object):
         if force_crlf:
             line_ending = "\r\n"
 
-        ret_string = self.header.get_row() + line_ending
+        rows = list(self.get_rows())
 
-        for batch in self.batches:
-            ret_string += batch.render_to_string(force_crlf=force_crlf)
+        # The last 9 fill row has no line ending, without fill the file
+        # control row does
+        if not self.get_nine_lines():
+            rows.append('')
+
+        return line_ending.join(rows)
+
+    def render_to_bytes(self, force_crlf=False):
+        """
+        Renders a nacha file as ASCII bytes. Rows are encoded a chunk at a
+        time, so the whole file is never held as a str as well.
+        """
+        output = io.BytesIO()
+        self.write_to(output, force_crlf=force_crlf, binary=True)
+
+        return output.getvalue()
+
+    def write_to(self, fileobj, force_crlf=False, binary=None):
+        """
+        Writes the nacha file to `fileobj` one batch at a time, so only one
+        batch is ever rendered in memory. The output is the same as
+        `render_to_string`.
+
+        `fileobj` can be a text or binary file object or a socket. ASCII
+        bytes are written unless it is a text file, `binary` overrides the
+        guess.
+        """
+        line_ending = "\n"
+        if force_crlf:
+            line_ending = "\r\n"
+
+        write = getattr(fileobj, 'write', None) or fileobj.sendall
+
+        if binary is None:
+            binary = not isinstance(fileobj, io.TextIOBase)
+
+        if binary:
+            write_text = write
+
+            def write(text):
+                write_text(text.encode('ascii'))
+
+        # Rows are written in chunks. The last row is held back because the
+        # final 9 fill row gets no line ending.
+        rows = []
+
+        for row in self.get_rows():
+            rows.append(row)
+
+            if len(rows) > self.WRITE_CHUNK_ROWS:
+                write(line_ending.join(rows[:-1]) + line_ending)
+                del rows[:-1]
+
+        if not self.get_nine_lines():
+            rows.append('')
+
+        write(line_ending.join(rows))
+
+    def render_parallel(self, processes=None, force_crlf=False):
+        """
+        Renders a nacha file as a string like `render_to_string`, building
+        and rendering the batches added with stream=True from entry lists
+        in a pool of `processes` worker processes.
+
+        Only those batches go to the workers: they are sent as their entry
+        dicts, which pickle much faster than built records, and each worker
+        returns the batch's rows with its batch control. Batches that are
+        already built render faster here than they would pickle.
+        """
+        line_ending = "\n"
+        if force_crlf:
+            line_ending = "\r\n"
+
+        jobs = [
+            (batch.batch_header,) + batch.source + (line_ending,)
+            for batch in self.batches if self.is_deferred(batch)
+        ]
+
+        processes = processes or multiprocessing.cpu_count()
+        pool = None
+
+        if processes == 1 or len(jobs) <= 1:
+            results = iter(map(_render_batch, jobs))
+        else:
+            pool = multiprocessing.Pool(processes)
+            results = pool.imap(_render_batch, jobs)
+
+        try:
+            parts = [self.header.get_row()]
+
+            for batch in self.batches:
+                if self.is_deferred(batch):
+                    text, batch.batch_control = next(results)
+                    batch.pending_entries = None
+                else:
+                    text = line_ending.join(batch.get_rows())
+
+                parts.append(text)
+
+                # Streamed batches only know their totals once rendered
+                if batch.streaming:
+                    self.totals.add(batch.batch_control)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.update_control()
+
+        parts.append(self.control.get_row())
+        parts.extend([NINES_ROW] * self.get_nine_lines())
+
+        # The last 9 fill row has no line ending, without fill the file
+        # control row does
+        if not self.get_nine_lines():
+            parts.append('')
+
+        return line_ending.join(parts)
+
+    def is_deferred(self, batch):
+        """
+        Returns whether render_parallel builds `batch` in a worker
+        """
+        return batch.streaming and batch.source is not None \
+            and batch.pending_entries is not None
+
+
+class AppendAchFile(AchFile):
+    """
+    An AchFile that is written to `path` one batch at a time.
+
+    Each batch is appended to the file as soon as it is added and then
+    dropped, so only the running control totals stay in memory. If `path`
+    already holds a file that was not finished, it is reopened: its totals
+    are rebuilt by parsing it, and new batches are appended after its last
+    complete batch. `finalize` writes the file control and 9 fill at the
+    end without rendering the earlier batches again.
+
+    A batch cut short, by a crash for example, is dropped on reopening and
+    has to be added again. So is a file control row or 9 fill cut short by
+    a crash in `finalize`, and the file can then be finalized again.
+    """
+
+    def __init__(self, path, file_id_mod, settings, force_crlf=False,
+                 entry_class=EntryDetail):
+
+        super(AppendAchFile, self).__init__(
+            file_id_mod, settings, entry_class
+        )
+
+        self.path = path
+        self.line_ending = "\r\n" if force_crlf else "\n"
+        self.fileobj = open(path, 'ab')
+
+        try:
+            if self.fileobj.tell():
+                self.resume()
+            else:
+                self.write_rows([self.header.get_row()])
+        except Exception:
+            self.fileobj.close()
+            raise
+
+    def resume(self):
+        """
+        Rebuilds the control totals of the partial file at `path` and cuts
+        off anything after its last complete batch
+        """
+        size = self.fileobj.tell()
+
+        with open(self.path, 'rb') as ach_file:
+            stride = record_stride(ach_file.read(RECORD_SIZE + 2))
+
+            # Rows are always written with a line ending, so a file
+            # without one has no complete row
+            if stride == RECORD_SIZE or size < stride:
+                raise AchError("%s has no complete file header" % self.path)
+
+            ach_file.seek(0)
+
+            lines = 0
+            complete_lines = 1
+
+            for event, data in StreamParser(ach_file, lazy=True):
+                if event == 'entry':
+                    lines += 1 + len(data['addenda'])
+                    continue
+
+                lines += 1
+
+                if (event == 'file_header') != (lines == 1):
+                    raise AchError("%s is not an ACH file" % self.path)
+
+                if event == 'file_header':
+                    self.check_header(data)
+
+                # A batch counts once its control row is complete
+                if event == 'batch_control' and lines * stride <= size:
+                    self.totals.add(data)
+                    complete_lines = lines
+
+                # A file control row or 9 fill cut short, by a crash in
+                # finalize for example, is dropped like an incomplete batch
+                elif event == 'file_control' \
+                        and size >= self.get_finalized_size(lines, stride):
+                    raise AchError(
+                        "%s already has a file control" % self.path
+                    )
+
+        if not lines:
+            raise AchError("%s is not an ACH file" % self.path)
+
+        self.line_ending = "\r\n" if stride == RECORD_SIZE + 2 else "\n"
+        self.fileobj.truncate(complete_lines * stride)
+        self.fileobj.seek(0, io.SEEK_END)
+        self.update_control()
+
+    def get_finalized_size(self, lines, stride):
+        """
+        Returns the size of the file once finalize has written its file
+        control, as row number `lines`, and its 9 fill
+        """
+        nine_lines = self.get_nine_lines()
+        size = (lines + nine_lines) * stride
+
+        # The last 9 fill row has no line ending
+        if nine_lines:
+            size -= stride - RECORD_SIZE
+
+        return size
+
+    def check_header(self, file_header):
+        """
+        Raises AchError if the file header of the reopened file is not for
+        the same destination, origin and file id modifier as this file, new
+        batches would not belong under it
+        """
+        for field in ('immediate_dest', 'immediate_org', 'file_id_mod'):
+            if file_header[field] != getattr(self.header, field):
+                raise AchError(
+                    "%s has %s %r in its file header, not %r" % (
+                        self.path, field, file_header[field].strip(),
+                        getattr(self.header, field).strip()
+                    )
+                )
+
+    def add_batch(self, *args, **kwargs):
+        """
+        Adds a batch like AchFile.add_batch and appends it to the file
+        """
+        self.check_open()
+        super(AppendAchFile, self).add_batch(*args, **kwargs)
+        self.write_batch(self.batches.pop())
+
+    def add_column_batch(self, *args, **kwargs):
+        """
+        Adds a batch like AchFile.add_column_batch and appends it to the
+        file
+        """
+        self.check_open()
+        super(AppendAchFile, self).add_column_batch(*args, **kwargs)
+        self.write_batch(self.batches.pop())
+
+    def get_next_batch_id(self):
+
+        return self.totals.batch_count + 1
+
+    def set_control(self):
+        """
+        Sets the file control from the running totals. Batches are dropped
+        once written, so the totals cannot be recounted from `batches`;
+        they are rebuilt from the file itself when it is reopened.
+        """
+        self.update_control()
+
+    def write_batch(self, batch):
+        """
+        Appends the rows of a batch to the file
+        """
+        rows = []
+
+        for row in batch.get_rows():
+            rows.append(row)
+
+            if len(rows) >= self.WRITE_CHUNK_ROWS:
+                self.write_rows(rows)
+                rows = []
+
+        self.write_rows(rows)
+        self.fileobj.flush()
+
+        # Streamed batches only know their totals once rendered
+        if batch.streaming:
+            self.totals.add(batch.batch_control)
+            self.update_control()
+
+    def write_rows(self, rows):
+        """
+        Writes rows to the file, each followed by a line ending
+        """
+        if rows:
+            self.fileobj.write(
+                (self.line_ending.join(rows) + self.line_ending)
+                .encode('ascii')
+            )
+
+    def finalize(self):
+        """
+        Writes the file control and 9 fill and closes the file
+        """
+        self.check_open()
+
+        rows = [self.control.get_row()]
+        rows.extend([NINES_ROW] * self.get_nine_lines())
+
+        # The last 9 fill row has no line ending, without fill the file
+        # control row does
+        if len(rows) == 1:
+            rows.append('')
+
+        self.fileobj.write(self.line_ending.join(rows).encode('ascii'))
+        self.close()
+
+    def close(self):
+        """
+        Closes the file without finishing it, it can be reopened later
+        """
+        self.fileobj.close()
+
+    def check_open(self):
+        if self.fileobj.closed:
+            raise AchError("%s is closed" % self.path)
+
+    def get_rows(self):
+        raise AchError(
+            "batches of an AppendAchFile are only written to %s" % self.path
+        )
+
+    def render_parallel(self, processes=None, force_crlf=False):
+        raise AchError(
+            "batches of an AppendAchFile are only written to %s" % self.path
+        )
+
+
+class BatchContext(object):
+    """
+    The constants shared by the batches of one SEC code and company in a
+    file: the batch header fields, the trace number prefix and the field
+    widths of the entries. They are validated and padded once, so each
+    entry only validates its own fields.
+    """
+
+    def __init__(self, std_ent_cls_code, settings, company_id,
+                 entry_desc, entry_class=EntryDetail):
+
+        self.std_ent_cls_code = std_ent_cls_code
+        self.entry_class = entry_class
+
+        # Every batch header is a copy of this one with its own service
+        # class code, batch id and effective entry date
+        self.batch_header = BatchHeader(
+            company_id=company_id,
+            std_ent_cls_code=std_ent_cls_code,
+            entry_desc=entry_desc,
+            desc_date='',
+            orig_stat_code='1',
+            orig_dfi_id=settings['immediate_dest'][:8],
+            company_name=settings['immediate_org_name']
+        )
+
+        self.entry_defaults = entry_class.get_field_defaults(std_ent_cls_code)
+
+        # The trace number is the prefix plus a 7 digit entry counter
+        self.trace_prefix = self.batch_header.validate_numeric_field(
+            settings['immediate_dest'][:8], 8
+        )
+
+        if std_ent_cls_code in ['CIE', 'MTE']:
+            self.name_length = EntryDetail.field_lengths['ind_name'][0]
+        else:
+            self.name_length = EntryDetail.field_lengths['ind_name'][1]
 
-        ret_string += self.control.get_row() + line_ending
+        self.entry_template = None
 
-        lines = self.get_lines(self.batches)
+    def get_entry_template(self):
+        """
+        Returns the RowTemplate of the entry detail rows of the batches,
+        built on first use. Its recv_dfi_id is the full 9 digit routing
+        number, check digit included.
+        """
+        if self.entry_template is None:
+            entry = self.new_entry()
+            set_fields(entry, {'recv_dfi_id': entry.make_zero(9)})
+
+            self.entry_template = RowTemplate(entry, [
+                'transaction_code', 'recv_dfi_id', 'dfi_acnt_num', 'amount',
+                'ind_name', 'trace_num'
+            ])
+
+        return self.entry_template
+
+    def get_batch_header(self, serv_cls_code, batch_id, eff_ent_date):
+
+        batch_header = copy.copy(self.batch_header)
+
+        batch_header.serv_cls_code = serv_cls_code
+        batch_header.batch_id = batch_id
+        batch_header.eff_ent_date = eff_ent_date
+
+        return batch_header
+
+    def build_entries(self, batch_entries, verify_routing=False):
+        """
+        Yields an (EntryDetail, addenda) tuple for each entry dict
+        """
+        entry_counter = 1
+
+        for record in batch_entries:
+            entry = self.build_entry(record, entry_counter)
+
+            if verify_routing and len(entry.recv_dfi_id) == 9 \
+                    and entry.check_digit != check_digit(entry.recv_dfi_id):
+                raise AchError(
+                    "invalid routing number check digit in entry %s"
+                    % (entry_counter - 1)
+                )
+
+            yield entry, record.get('addenda', [])
+            entry_counter += 1
+
+    def new_entry(self):
+        """
+        Returns an entry of entry_class with every field set to the
+        precomputed defaults, without validating them again
+        """
+        entry = self.entry_class.__new__(self.entry_class)
+        set_fields(entry, self.entry_defaults)
+
+        return entry
+
+    def build_entry(self, record, entry_counter):
+        """
+        Returns the entry record of an entry dict. Its blank fields are
+        copied from the precomputed defaults and only the fields of the
+        entry are validated.
+        """
+        entry = self.new_entry()
+
+        routing_number = record['routing_number']
+
+        if entry_counter >= 10000000:
+            raise AchError("field can only be 15 digits long")
+
+        if len(routing_number) > 8:
+            recv_dfi_id = entry.validate_numeric_field(routing_number, 9)
+            digit = recv_dfi_id[8]
+        else:
+            recv_dfi_id = entry.validate_numeric_field(routing_number, 8)
+            digit = check_digit(recv_dfi_id)
+
+        fields = {
+            'transaction_code': entry.validate_numeric_field(
+                record.get('type'), 2
+            ),
+            'recv_dfi_id': recv_dfi_id,
+            'check_digit': digit,
+            'dfi_acnt_num': entry.validate_alpha_numeric_field(
+                record['account_number'], 17
+            ),
+            'amount': entry.validate_numeric_field(
+                int(round(float(record['amount']) * 100)), 10
+            ),
+            'ind_name': entry.validate_alpha_numeric_field(
+                record['name'].upper()[:22], self.name_length
+            ),
+            'trace_num': self.trace_prefix + str(entry_counter).zfill(7),
+        }
+
+        set_fields(entry, fields)
+
+        return entry
+
+
+def set_fields(record, fields):
+    """
+    Sets already validated fields of a record without validating them
+    again. They are set one by one like from_fields does, which works for
+    the __slots__ based Compact* records too. Updating the __dict__ of a
+    new record directly would be faster, but CPython then gives it a dict
+    of its own rather than one sharing its keys with every other record,
+    and that takes about 70% more memory per entry.
+    """
+    for name, value in fields.items():
+        Ach.__setattr__(record, name, value)
+
+
+def _render_batch(job):
+    """
+    Worker for `AchFile.render_parallel`, builds and renders one batch and
+    returns its rows joined by the line ending with its batch control
+    """
+    batch_header, context, batch_entries, verify_routing, line_ending = job
 
-        nine_lines = int(round(10 * (math.ceil(lines / 10.0) - (lines / 10.0))))
+    batch = StreamingFileBatch(
+        batch_header, context.build_entries(batch_entries, verify_routing)
+    )
+    text = line_ending.join(batch.get_rows())
 
-        ret_string += self.get_nines(nine_lines, line_ending)
+    return text, batch.batch_control
 
-        return ret_string
+
+class ControlTotals(object):
+    """
+    Running totals of the batch controls added to a file. Each batch is
+    counted once when it is added, so building the file control does not
+    walk all the batches again.
+    """
+
+    def __init__(self):
+        self.batch_count = 0
+        self.entadd_count = 0
+        self.entry_hash = 0
+        self.debit_amount = 0
+        self.credit_amount = 0
+
+    def add(self, batch_control):
+        """
+        Adds the totals of a batch control record
+        """
+        self.batch_count += 1
+        self.entadd_count += int(batch_control.entadd_count)
+        self.entry_hash += int(batch_control.entry_hash)
+        self.debit_amount += int(batch_control.debit_amount)
+        self.credit_amount += int(batch_control.credit_amount)
+
+    def get_lines(self):
+        """
+        Returns the number of records in the file, not counting the 9 fill
+        """
+        # File header and control plus a header and control per batch
+        return 2 + 2 * self.batch_count + self.entadd_count
+
+    def get_block_count(self):
+
+        return int(math.ceil(self.get_lines() / 10.0))
+
+    def get_entry_hash(self):
+        """
+        Returns the entry hash truncated to its last 10 digits
+        """
+        return str(self.entry_hash)[-10:]
+
+    def get_file_control(self):
+
+        return FileControl(
+            self.batch_count, self.get_block_count(), self.entadd_count,
+            self.get_entry_hash(), self.debit_amount, self.credit_amount
+        )
 
 
 class FileBatch(object):
@@ -225,6 +917,9 @@ class FileBatch(object):
     BatchControl (1)
     """
 
+    # True when entries are only built as the batch is rendered
+    streaming = False
+
     def __init__(self, batch_header, entries):
         """
         args: batch_header (BatchHeader), entries (List[FileEntry])
@@ -242,17 +937,27 @@ class FileBatch(object):
 
         #set up batch_control
 
+        self.batch_control = self.get_batch_control(
+            entadd_count,
+            self.get_entry_hash(self.entries),
+            self.get_debit_amount(self.entries),
+            self.get_credit_amount(self.entries)
+        )
+
+    def get_batch_control(self, entadd_count, entry_hash, debit_amount,
+                          credit_amount):
+
         batch_control = BatchControl(self.batch_header.serv_cls_code)
 
         batch_control.entadd_count = entadd_count
-        batch_control.entry_hash = self.get_entry_hash(self.entries)
-        batch_control.debit_amount = self.get_debit_amount(self.entries)
-        batch_control.credit_amount = self.get_credit_amount(self.entries)
+        batch_control.entry_hash = entry_hash
+        batch_control.debit_amount = debit_amount
+        batch_control.credit_amount = credit_amount
         batch_control.company_id = self.batch_header.company_id
         batch_control.orig_dfi_id = self.batch_header.orig_dfi_id
         batch_control.batch_id = self.batch_header.batch_id
 
-        self.batch_control = batch_control
+        return batch_control
 
     def get_entry_hash(self, entries):
 
@@ -274,7 +979,7 @@ class FileBatch(object):
 
         for entry in entries:
             if str(entry.entry_detail.transaction_code) in \
-                    ['27', '37', '28', '38']:
+                    DEBIT_TRANSACTION_CODES:
                 debit_amount = debit_amount + int(entry.entry_detail.amount)
 
         return debit_amount
@@ -284,7 +989,7 @@ class FileBatch(object):
 
         for entry in entries:
             if str(entry.entry_detail.transaction_code) in \
-                    ['22', '32', '23', '33']:
+                    CREDIT_TRANSACTION_CODES:
                 credit_amount += int(entry.entry_detail.amount)
 
         return credit_amount
@@ -297,14 +1002,160 @@ class FileBatch(object):
         if force_crlf:
             line_ending = "\r\n"
 
-        ret_string = self.batch_header.get_row() + line_ending
+        rows = list(self.get_rows())
+        rows.append('')
+
+        return line_ending.join(rows)
+
+    def get_rows(self):
+        """
+        Yields the rows of the batch without line endings
+        """
+        yield self.batch_header.get_row()
 
         for entry in self.entries:
-            ret_string += entry.render_to_string(force_crlf=force_crlf)
+            for row in entry.get_rows():
+                yield row
+
+        yield self.batch_control.get_row()
+
+
+class StreamingFileBatch(FileBatch):
+    """
+    A FileBatch whose entries come from an iterator and are only built as
+    the batch is rendered. The batch control totals are accumulated along
+    the way and its row is emitted after the last entry, so the batch can
+    be rendered only once.
+    """
+
+    streaming = True
+
+    def __init__(self, batch_header, entries, source=None):
+        """
+        args: batch_header (BatchHeader),
+        entries (Iterable[(EntryDetail, List[dict])]),
+        source ((BatchContext, List[dict], bool)) the context, entry dicts
+        and verify_routing flag the entries are built from, if they can be
+        built again in another process
+        """
 
-        ret_string += self.batch_control.get_row() + line_ending
+        self.batch_header = batch_header
+        self.entries = []
+        self.pending_entries = iter(entries)
+        self.source = source
+        self.batch_control = None
+
+    def get_rows(self):
+        """
+        Yields the rows of the batch without line endings, building each
+        entry as it goes
+        """
+        if self.pending_entries is None:
+            raise AchError("streamed batch has already been rendered")
 
-        return ret_string
+        entries, self.pending_entries = self.pending_entries, None
+
+        entadd_count = 0
+        entry_hash = 0
+        debit_amount = 0
+        credit_amount = 0
+
+        yield self.batch_header.get_row()
+
+        for entry, addenda in entries:
+            file_entry = FileEntry(entry, addenda)
+
+            entadd_count += 1 + len(file_entry.addenda_record)
+            entry_hash += int(entry.recv_dfi_id[:8])
+
+            transaction_code = str(entry.transaction_code)
+            if transaction_code in DEBIT_TRANSACTION_CODES:
+                debit_amount += int(entry.amount)
+            elif transaction_code in CREDIT_TRANSACTION_CODES:
+                credit_amount += int(entry.amount)
+
+            for row in file_entry.get_rows():
+                yield row
+
+        self.batch_control = self.get_batch_control(
+            entadd_count, str(entry_hash)[-10:], debit_amount, credit_amount
+        )
+
+        yield self.batch_control.get_row()
+
+
+class ColumnBatch(FileBatch):
+    """
+    A FileBatch whose entry detail rows are rendered from validated columns
+    with the entry template of its BatchContext. It holds the rendered rows
+    rather than FileEntry objects.
+    """
+
+    def __init__(self, batch_header, context, fields):
+        """
+        args: batch_header (BatchHeader), context (BatchContext),
+        fields (dict) padded columns from validate_entry_columns
+        """
+
+        self.batch_header = batch_header
+        self.entries = []
+
+        transaction_codes = as_list(fields['transaction_code'])
+        amounts = as_list(fields['amount'])
+        recv_dfi_ids = as_list(fields['recv_dfi_id'])
+
+        # 8 digit routing numbers get their check digit appended
+        digits = check_digits(recv_dfi_ids)[0]
+        routing_numbers = [
+            recv_dfi_id if len(recv_dfi_id) == 9 else recv_dfi_id + digit
+            for recv_dfi_id, digit in zip(recv_dfi_ids, digits)
+        ]
+
+        trace_prefix = context.trace_prefix
+
+        if len(amounts) >= 10000000:
+            raise AchError("field can only be 15 digits long")
+
+        self.entry_rows = context.get_entry_template().render_rows({
+            'transaction_code': transaction_codes,
+            'recv_dfi_id': routing_numbers,
+            'dfi_acnt_num': fields['dfi_acnt_num'],
+            'amount': amounts,
+            'ind_name': fields['ind_name'],
+            'trace_num': [
+                trace_prefix + str(counter).zfill(7)
+                for counter in range(1, len(amounts) + 1)
+            ],
+        })
+
+        debit_amount = 0
+        credit_amount = 0
+
+        for transaction_code, amount in zip(transaction_codes, amounts):
+            if transaction_code in DEBIT_TRANSACTION_CODES:
+                debit_amount += int(amount)
+            elif transaction_code in CREDIT_TRANSACTION_CODES:
+                credit_amount += int(amount)
+
+        entry_hash = sum(
+            int(routing_number[:8]) for routing_number in routing_numbers
+        )
+
+        self.batch_control = self.get_batch_control(
+            len(self.entry_rows), str(entry_hash)[-10:], debit_amount,
+            credit_amount
+        )
+
+    def get_rows(self):
+        """
+        Yields the rows of the batch without line endings
+        """
+        yield self.batch_header.get_row()
+
+        for row in self.entry_rows:
+            yield row
+
+        yield self.batch_control.get_row()
 
 
 class FileEntry(object):
@@ -325,12 +1176,12 @@ class FileEntry(object):
 
         for index, addenda in enumerate(addenda_record):
             self.addenda_record.append(
-                AddendaRecord(
-                    self.entry_detail.std_ent_cls_code,
-                    pmt_rel_info=addenda.get('payment_related_info').upper(),
-                    add_seq_num=index + 1,
-                    ent_det_seq_num=entry_detail.trace_num[-7:]
-                )
+                AddendaRecord.from_fields({
+                    'pmt_rel_info':
+                        addenda.get('payment_related_info').upper(),
+                    'add_seq_num': index + 1,
+                    'ent_det_seq_num': entry_detail.trace_num[-7:],
+                }, self.entry_detail.std_ent_cls_code)
             )
 
         if self.addenda_record:
@@ -344,9 +1195,17 @@ class FileEntry(object):
         if force_crlf:
             line_ending = "\r\n"
 
-        ret_string = self.entry_detail.get_row() + line_ending
+        rows = list(self.get_rows())
+        rows.append('')
 
-        for addenda in self.addenda_record:
-            ret_string += addenda.get_row() + line_ending
+        return line_ending.join(rows)
 
-        return ret_string
+    def get_rows(self):
+        """
+        Yields the entry detail row and its addenda rows without line
+        endings
+        """
+        yield self.entry_detail.get_row()
+
+        for addenda in self.addenda_record:
+            yield addenda.get_row()
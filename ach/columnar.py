@@ -0,0 +1,94 @@
+"""
+Column oriented export of entry detail records using NumPy
+"""
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import as_strided
+except ImportError:
+    np = None
+
+from .data_types import AchError
+from .parser import RECORD_SIZE, record_stride
+
+
+# (start, end) of the entry detail fields that are exported
+ENTRY_COLUMNS = {
+    'transaction_code': (1, 3),
+    'routing_number': (3, 12),
+    'dfi_acnt_num': (12, 29),
+    'amount': (29, 39),
+    'trace_num': (79, 94),
+}
+
+
+def record_matrix(data):
+    """
+    Returns the records in `data` (bytes, bytearray, mmap or memoryview) as
+    a 2D uint8 array with one row of 94 columns per record. The array is a
+    strided view of `data`, line endings are stepped over without copying.
+    """
+    if np is None:
+        raise ImportError('numpy is required for columnar export')
+
+    raw = np.frombuffer(data, dtype=np.uint8)
+    stride = record_stride(data)
+    count = (len(raw) + stride - RECORD_SIZE) // stride
+
+    if count <= 0:
+        return np.zeros((0, RECORD_SIZE), dtype=np.uint8)
+
+    return as_strided(
+        raw, shape=(count, RECORD_SIZE), strides=(stride, 1), writeable=False
+    )
+
+
+def digits_to_int(digits, name='field'):
+    """
+    Converts a 2D uint8 array of ASCII digits into an int64 array, one
+    number per row
+    """
+    values = digits.astype(np.int64) - ord('0')
+
+    if values.size and (values.min() < 0 or values.max() > 9):
+        raise AchError('%s needs to be numeric characters only' % name)
+
+    powers = 10 ** np.arange(digits.shape[1] - 1, -1, -1, dtype=np.int64)
+
+    return values.dot(powers)
+
+
+def entry_columns(data):
+    """
+    Returns a dict of NumPy arrays with one element per entry detail
+    record in `data`:
+
+    batch_index (int64): position of the entry's batch in the file
+    transaction_code (int64)
+    routing_number (S9): receiving DFI id and check digit
+    dfi_acnt_num (S17)
+    amount (int64): in cents
+    trace_num (int64)
+
+    Nothing is created per row, every column is computed over the whole
+    fixed width buffer at once.
+    """
+    records = record_matrix(data)
+    record_types = records[:, 0]
+
+    batch_index = np.cumsum(record_types == ord('5')) - 1
+    is_entry = record_types == ord('6')
+    entries = records[is_entry]
+
+    columns = {'batch_index': batch_index[is_entry]}
+
+    for name in ('transaction_code', 'amount', 'trace_num'):
+        start, end = ENTRY_COLUMNS[name]
+        columns[name] = digits_to_int(entries[:, start:end], name)
+
+    for name in ('routing_number', 'dfi_acnt_num'):
+        start, end = ENTRY_COLUMNS[name]
+        columns[name] = np.ascontiguousarray(
+            entries[:, start:end]
+        ).view('S%d' % (end - start)).ravel()
+
+    return columns
@@ -2,6 +2,7 @@ import math
 import re
 import string
 from datetime import datetime
+from operator import attrgetter
 
 """
 Collection of classes that comprise the row type objects
@@ -13,22 +14,96 @@ class AchError(Exception):
     pass
 
 
+DEBIT_TRANSACTION_CODES = ('27', '37', '28', '38')
+CREDIT_TRANSACTION_CODES = ('22', '32', '23', '33')
+
+
+# Padding strings are built once and shared by every record
+PADDING_CACHE_SIZE = 95
+SPACES = [' ' * count for count in range(PADDING_CACHE_SIZE)]
+ZEROS = ['0' * count for count in range(PADDING_CACHE_SIZE)]
+
+# Compiled alpha numeric field patterns keyed on field length
+ALPHA_NUMERIC_PATTERNS = {}
+
+
+def alpha_numeric_pattern(length):
+    """
+    Returns the compiled pattern matching the start of an alpha numeric
+    field of up to `length` characters
+    """
+    pattern = ALPHA_NUMERIC_PATTERNS.get(length)
+
+    if pattern is None:
+        pattern = re.compile(r'[\w,\s]{1,%d}' % length)
+        ALPHA_NUMERIC_PATTERNS[length] = pattern
+
+    return pattern
+
+
 class Ach(object):
     """
     Base class for ACH record fields
     """
 
+    # Lets the compact record classes do without an instance __dict__
+    __slots__ = ()
+
+    @classmethod
+    def get_field_defaults(cls, *args):
+        """
+        Returns a dict of every field's value in a record built with
+        `args` and nothing else, i.e. the padding for the blank fields.
+        Computed once per class and args.
+        """
+        cache = cls.__dict__.get('_field_defaults')
+
+        if cache is None:
+            cache = {}
+            cls._field_defaults = cache
+
+        if args not in cache:
+            record = cls(*args)
+            names = set(getattr(cls, 'numeric_fields', [])) \
+                | set(getattr(cls, 'alpha_numeric_fields', [])) \
+                | set(['std_ent_cls_code'])
+
+            cache[args] = dict(
+                (name, getattr(record, name))
+                for name in names if hasattr(record, name)
+            )
+
+        return cache[args]
+
+    @classmethod
+    def from_fields(cls, fields, *args):
+        """
+        Fast constructor for EntryDetail and AddendaRecord. `args` are
+        passed to the constructor (the std_ent_cls_code) and `fields` is a
+        mapping or sequence of (name, value) pairs.
+
+        Only the given fields are validated, every other field is filled
+        from the precomputed padding of get_field_defaults.
+        """
+        record = cls.__new__(cls)
+
+        for name, value in cls.get_field_defaults(*args).items():
+            Ach.__setattr__(record, name, value)
+
+        for name, value in dict(fields).items():
+            setattr(record, name, value)
+
+        return record
+
     def make_space(self, spaces=1):
         """
         Return string with x number of spaces
         Defaults to 1
         """
-        space_string = ''
-
-        for i in range(spaces):
-            space_string += ' '
+        if spaces < PADDING_CACHE_SIZE:
+            return SPACES[spaces]
 
-        return space_string
+        return ' ' * spaces
 
     def make_right_justified(self, field, length):
         """
@@ -47,12 +122,10 @@ class Ach(object):
         Return string with x number of zeros
         Defaults to 1
         """
-        zero_string = ''
+        if zeros < PADDING_CACHE_SIZE:
+            return ZEROS[zeros]
 
-        for i in range(zeros):
-            zero_string += '0'
-
-        return zero_string
+        return '0' * zeros
 
     def validate_alpha_numeric_field(self, field, length):
         """
@@ -60,16 +133,17 @@ class Ach(object):
         field: (str)
         length: (int)
         """
-        str_length = str(length)
+        try:
+            pattern = ALPHA_NUMERIC_PATTERNS[length]
+        except KeyError:
+            pattern = alpha_numeric_pattern(length)
 
-        match = re.match(r'([\w,\s]{1,' + str_length + '})', field)
+        match = pattern.match(field)
 
         if match:
-            if len(match.group(1)) < length:
-                field = match.group(1) + self.make_space(
-                    length - len(match.group(1)))
-            else:
-                field = match.group(1)
+            field = match.group()
+            if len(field) < length:
+                field += self.make_space(length - len(field))
         else:
             raise AchError("field does not match alpha numeric criteria")
 
@@ -166,7 +240,7 @@ class Header(Ach):
                 '%s not in alpha numeric field list' % name
             )
 
-        super(Header, self).__setattr__(name, value)
+        Ach.__setattr__(self, name, value)
 
     def validate_file_id_mod(self, file_id_mod):
         '''
@@ -259,7 +333,7 @@ class FileControl(Ach):
                 '%s not in numeric field list' % name
             )
 
-        super(FileControl, self).__setattr__(name, value)
+        Ach.__setattr__(self, name, value)
 
     def get_row(self):
 
@@ -360,7 +434,7 @@ class BatchHeader(Ach):
                 '%s not in numeric or alpha numeric fields list' % name
             )
 
-        super(BatchHeader, self).__setattr__(name, value)
+        Ach.__setattr__(self, name, value)
 
     def get_row(self):
 
@@ -445,7 +519,7 @@ class BatchControl(Ach):
                 "%s not in numeric_fields or alpha_numeric_fields" % name
             )
 
-        super(BatchControl, self).__setattr__(name, value)
+        Ach.__setattr__(self, name, value)
 
     def get_row(self):
 
@@ -514,6 +588,15 @@ class EntryDetail(Ach):
         'trace_num'             : 15,
     }
 
+    # Fields every entry detail row starts and ends with
+    row_start = ['record_type_code', 'transaction_code', 'recv_dfi_id',
+                 'check_digit', 'dfi_acnt_num', 'amount']
+    row_end = ['add_rec_ind', 'trace_num']
+
+    # Row fields and getters by SEC code, see register_row_layout
+    row_fields = {}
+    row_layouts = {}
+
     def __init__(self, std_ent_cls_code='PPD', transaction_code='', recv_dfi_id='',
                  check_digit='', amount='', num_add_recs='', card_exp_date='',
                  doc_ref_num='', ind_card_acct_num='', card_tr_typ_code_shr='',
@@ -611,81 +694,44 @@ class EntryDetail(Ach):
                 "%s not in numeric_fields or alpha_numeric_fields" % name
             )
 
-        super(EntryDetail, self).__setattr__(name, value)
+        Ach.__setattr__(self, name, value)
+
+    @classmethod
+    def register_row_layout(cls, std_ent_cls_code, fields):
+        """
+        Registers the row layout of a SEC code. `fields` are the SEC code
+        specific fields between the amount and add_rec_ind.
+
+        Two getters of the row's fields are compiled, the check digit is
+        left out of the row when recv_dfi_id already has 9 digits.
+        """
+        fields = cls.row_start + list(fields) + cls.row_end
+        short_fields = [field for field in fields if field != 'check_digit']
+
+        cls.row_fields[std_ent_cls_code] = (fields, short_fields)
+        cls.row_layouts[std_ent_cls_code] = (
+            attrgetter(*fields), attrgetter(*short_fields)
+        )
 
     def get_row(self):
 
-        ret_string = ''
+        layout = self.row_layouts[self.std_ent_cls_code]
 
-        ret_string = self.record_type_code +\
-            self.transaction_code +\
-            self.recv_dfi_id
+        if len(self.recv_dfi_id) < 9:
+            return ''.join(layout[0](self))
+
+        return ''.join(layout[1](self))
+
+    def get_row_fields(self):
+        """
+        Returns the names of the fields in this record's row, in order
+        """
+        fields = self.row_fields[self.std_ent_cls_code]
 
         if len(self.recv_dfi_id) < 9:
-            ret_string += self.check_digit
-
-        ret_string += self.dfi_acnt_num +\
-            self.amount
-
-        if self.std_ent_cls_code in ['ARC', 'BOC']:
-            ret_string += self.chk_serial_num +\
-                self.ind_name +\
-                self.disc_data
-
-        elif self.std_ent_cls_code in ['CCD', 'PPD', 'TEL']:
-            ret_string += self.id_number +\
-                self.ind_name +\
-                self.disc_data
-
-        elif self.std_ent_cls_code == 'CIE':
-            ret_string += self.ind_name +\
-                self.ind_id +\
-                self.disc_data
-
-        elif self.std_ent_cls_code == 'CTX':
-            ret_string += self.id_number +\
-                self.num_add_recs +\
-                self.recv_cmpy_name +\
-                self.reserved +\
-                self.disc_data
-
-        elif self.std_ent_cls_code == 'MTE':
-            ret_string += self.ind_name +\
-                self.ind_id +\
-                self.disc_data
-
-        elif self.std_ent_cls_code == 'POP':
-            ret_string += self.chk_serial_num +\
-                self.terminal_city +\
-                self.terminal_state +\
-                self.ind_name +\
-                self.disc_data
-
-        elif self.std_ent_cls_code == 'POS':
-            ret_string += self.id_number +\
-                self.ind_name +\
-                self.card_tr_typ_code_pos
-
-        elif self.std_ent_cls_code == 'SHR':
-            ret_string += self.card_exp_date +\
-                self.doc_ref_num +\
-                self.ind_card_acct_num +\
-                self.card_tr_typ_code_shr
-
-        elif self.std_ent_cls_code == 'RCK':
-            ret_string += self.chk_serial_num +\
-                self.ind_name +\
-                self.disc_data
-
-        elif self.std_ent_cls_code == 'WEB':
-            ret_string += self.id_number +\
-                self.ind_name +\
-                self.pmt_type_code
-
-        ret_string += self.add_rec_ind +\
-            self.trace_num
-
-        return ret_string
+            return fields[0]
+
+        return fields[1]
 
     def get_count(self):
         return len(self.get_row())
@@ -740,6 +786,12 @@ class AddendaRecord(Ach):
         'add_seq_num': 4,
     }
 
+    row_start = ['record_type_code', 'addenda_type_code']
+
+    # Row fields and getters by SEC code, see register_row_layout
+    row_fields = {}
+    row_layouts = {}
+
     def __init__(self, std_ent_cls_code='PPD', trans_desc='', net_id_code='',
                  term_id_code='', ref_info_1='', ref_info_2='',
                  trans_serial_code='', trans_date='', trans_time='',
@@ -785,45 +837,160 @@ class AddendaRecord(Ach):
                 "%s not in numeric or alpha numeric fields" % value
             )
 
-        super(AddendaRecord, self).__setattr__(name, value)
+        Ach.__setattr__(self, name, value)
+
+    @classmethod
+    def register_row_layout(cls, std_ent_cls_code, fields):
+        """
+        Registers the row layout of a SEC code. `fields` are the fields
+        following the addenda type code. Registering None sets the layout
+        used by SEC codes without a layout of their own.
+        """
+        fields = cls.row_start + list(fields)
+
+        if std_ent_cls_code is None:
+            cls.default_row_fields = fields
+            cls.default_row_layout = attrgetter(*fields)
+        else:
+            cls.row_fields[std_ent_cls_code] = fields
+            cls.row_layouts[std_ent_cls_code] = attrgetter(*fields)
 
     def get_row(self):
 
-        ret_string = ''
-
-        ret_string += self.record_type_code +\
-            self.addenda_type_code
-
-        if self.std_ent_cls_code == 'MTE':
-            ret_string += self.trans_desc +\
-                self.net_id_code +\
-                self.term_id_code +\
-                self.trans_serial_code +\
-                self.trans_date +\
-                self.trans_time +\
-                self.terminal_loc +\
-                self.terminal_city +\
-                self.terminal_state +\
-                self.trace_num
-
-        elif self.std_ent_cls_code in ['POS', 'SHR']:
-            ret_string += self.ref_info_1 +\
-                self.ref_info_2 +\
-                self.term_id_code +\
-                self.trans_serial_code +\
-                self.trans_date +\
-                self.auth_card_exp +\
-                self.terminal_loc +\
-                self.terminal_city +\
-                self.terminal_state +\
-                self.trace_num
+        layout = self.row_layouts.get(
+            self.std_ent_cls_code, self.default_row_layout
+        )
 
-        else:
-            ret_string += self.pmt_rel_info +\
-                self.add_seq_num +\
-                self.ent_det_seq_num
+        return ''.join(layout(self))
 
-        return ret_string
+    def get_row_fields(self):
+        """
+        Returns the names of the fields in this record's row, in order
+        """
+        return self.row_fields.get(
+            self.std_ent_cls_code, self.default_row_fields
+        )
 
     def get_count(self):
         return len(self.get_row())
+
+
+def register_sec_code(std_ent_cls_code, entry_fields, addenda_fields=None):
+    """
+    Adds a SEC code to the batch header and entry detail records, with the
+    layout of its entry detail rows and, optionally, of its addenda rows
+    """
+    for record_cls in (BatchHeader, EntryDetail):
+        if std_ent_cls_code not in record_cls.std_ent_cls_code_list:
+            record_cls.std_ent_cls_code_list.append(std_ent_cls_code)
+
+    EntryDetail.register_row_layout(std_ent_cls_code, entry_fields)
+
+    if addenda_fields is not None:
+        AddendaRecord.register_row_layout(std_ent_cls_code, addenda_fields)
+
+
+def unregister_sec_code(std_ent_cls_code):
+    """
+    Removes a SEC code added with register_sec_code, with its row layouts
+    and cached field defaults. Unknown SEC codes are ignored.
+    """
+    for record_cls in (BatchHeader, EntryDetail):
+        if std_ent_cls_code in record_cls.std_ent_cls_code_list:
+            record_cls.std_ent_cls_code_list.remove(std_ent_cls_code)
+
+    for record_cls in (EntryDetail, AddendaRecord):
+        record_cls.row_fields.pop(std_ent_cls_code, None)
+        record_cls.row_layouts.pop(std_ent_cls_code, None)
+
+        defaults = record_cls.__dict__.get('_field_defaults', {})
+        for args in list(defaults):
+            if args[:1] == (std_ent_cls_code,):
+                del defaults[args]
+
+
+for std_ent_cls_codes, fields in [
+        (['ARC', 'BOC', 'RCK'], ['chk_serial_num', 'ind_name', 'disc_data']),
+        (['CCD', 'PPD', 'TEL'], ['id_number', 'ind_name', 'disc_data']),
+        (['CIE', 'MTE'], ['ind_name', 'ind_id', 'disc_data']),
+        (['CTX'], ['id_number', 'num_add_recs', 'recv_cmpy_name',
+                   'reserved', 'disc_data']),
+        (['POP'], ['chk_serial_num', 'terminal_city', 'terminal_state',
+                   'ind_name', 'disc_data']),
+        (['POS'], ['id_number', 'ind_name', 'card_tr_typ_code_pos']),
+        (['SHR'], ['card_exp_date', 'doc_ref_num', 'ind_card_acct_num',
+                   'card_tr_typ_code_shr']),
+        (['WEB'], ['id_number', 'ind_name', 'pmt_type_code'])]:
+    for std_ent_cls_code in std_ent_cls_codes:
+        EntryDetail.register_row_layout(std_ent_cls_code, fields)
+
+AddendaRecord.register_row_layout('MTE', [
+    'trans_desc', 'net_id_code', 'term_id_code', 'trans_serial_code',
+    'trans_date', 'trans_time', 'terminal_loc', 'terminal_city',
+    'terminal_state', 'trace_num'
+])
+
+for std_ent_cls_code in ['POS', 'SHR']:
+    AddendaRecord.register_row_layout(std_ent_cls_code, [
+        'ref_info_1', 'ref_info_2', 'term_id_code', 'trans_serial_code',
+        'trans_date', 'auth_card_exp', 'terminal_loc', 'terminal_city',
+        'terminal_state', 'trace_num'
+    ])
+
+AddendaRecord.register_row_layout(None, [
+    'pmt_rel_info', 'add_seq_num', 'ent_det_seq_num'
+])
+
+
+def _get_slot_state(self):
+    return dict(
+        (name, getattr(self, name))
+        for name in self.__slots__ if hasattr(self, name)
+    )
+
+
+def _set_slot_state(self, state):
+    # The values were validated when first set, and re-validating them in
+    # arbitrary order would break fields that depend on std_ent_cls_code
+    for name, value in state.items():
+        Ach.__setattr__(self, name, value)
+
+
+def compact_record(record_cls):
+    """
+    Returns a __slots__ based copy of one of the record classes above.
+
+    Instances keep their fields in slots rather than a per-instance
+    __dict__, which takes much less memory when millions of records are
+    built. Validation and rendering are the same as record_cls, since
+    the copy shares its methods.
+    """
+    field_names = set(getattr(record_cls, 'numeric_fields', [])) \
+        | set(getattr(record_cls, 'alpha_numeric_fields', [])) \
+        | set(getattr(record_cls, 'field_lengths', {})) \
+        | set(['std_ent_cls_code'])
+
+    # Constant fields such as record_type_code stay class attributes
+    slots = tuple(sorted(
+        name for name in field_names if not hasattr(record_cls, name)
+    ))
+
+    namespace = dict(
+        (key, value) for key, value in vars(record_cls).items()
+        if key not in ('__dict__', '__weakref__')
+    )
+    namespace['__slots__'] = slots
+    namespace['__getstate__'] = _get_slot_state
+    namespace['__setstate__'] = _set_slot_state
+
+    return type(
+        'Compact' + record_cls.__name__, record_cls.__bases__, namespace
+    )
+
+
+CompactHeader = compact_record(Header)
+CompactFileControl = compact_record(FileControl)
+CompactBatchHeader = compact_record(BatchHeader)
+CompactBatchControl = compact_record(BatchControl)
+CompactEntryDetail = compact_record(EntryDetail)
+CompactAddendaRecord = compact_record(AddendaRecord)
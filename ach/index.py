@@ -0,0 +1,317 @@
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from itertools import starmap
+
+from .parser import RECORD_SIZE, MappedParser, Parser, StreamParser
+
+
+class PackedTable(object):
+    '''
+    Read only sequence of fixed width records packed with `record` (a
+    struct.Struct) into `buffer` from `offset` on. Records are unpacked
+    only when read, so a table in a memory mapped file costs nothing until
+    it is used, and a sorted table can be searched with ``bisect``.
+    '''
+
+    def __init__(self, buffer, offset, count, record):
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+        self.record = record
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('table index out of range')
+
+        return self.record.unpack_from(
+            self.buffer, self.offset + index * self.record.size
+        )
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def find(self, key):
+        '''
+        Yields every record of a sorted table whose first field is `key`
+        '''
+        index = bisect_left(self, (key,))
+
+        while index < self.count:
+            found = self[index]
+
+            if found[0] != key:
+                return
+
+            yield found
+            index += 1
+
+
+class AchIndex(object):
+    '''
+    Byte offset index of an ACH file for random access
+
+    Records where every batch header and batch control starts, where every
+    entry detail starts and how many addenda follow it, plus tables sorted
+    by batch id and trace number. The index is saved to a sidecar file
+    next to the ACH file so later lookups do not re-read the whole file.
+
+    The sidecar holds the tables as fixed width binary records and is
+    memory mapped when loaded, so opening it does not read it: batch N is
+    one record away and a trace number is a binary search.
+    '''
+
+    SIDECAR_SUFFIX = '.idx'
+    MAGIC = b'ACHINDEX'
+    VERSION = 2
+
+    # magic, version, ACH file size and mtime, record stride, batch count,
+    # entry count
+    HEADER = struct.Struct('<8sIQdIII')
+    # header offset, control offset, first entry, entry count, batch id
+    BATCH_RECORD = struct.Struct('<QQII7s')
+    # batch id, batch index
+    BATCH_ID_RECORD = struct.Struct('<7sI')
+    # entry offset, addenda count
+    ENTRY_RECORD = struct.Struct('<QI')
+    # trace number, entry offset, addenda count
+    TRACE_RECORD = struct.Struct('<15sQI')
+
+    def __init__(self, path, data):
+        '''
+        args: path (str) of the ACH file, data (bytes or mmap) the index in
+        its sidecar format
+        '''
+        self.path = path
+        self.data = data
+
+        magic, version, self.size, self.mtime, self.stride, batch_count, \
+            entry_count = self.HEADER.unpack_from(data, 0)
+
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError('not an ACH index')
+
+        offset = self.HEADER.size
+        tables = []
+
+        for record, count in ((self.BATCH_RECORD, batch_count),
+                              (self.BATCH_ID_RECORD, batch_count),
+                              (self.ENTRY_RECORD, entry_count),
+                              (self.TRACE_RECORD, entry_count)):
+            tables.append(PackedTable(data, offset, count, record))
+            offset += count * record.size
+
+        if offset != len(data):
+            raise ValueError('truncated ACH index')
+
+        self.batches, self.batch_ids, self.entries, self.trace_nums = tables
+
+    @classmethod
+    def build(cls, path):
+        '''
+        Reads the ACH file once and returns its index. Records are found
+        from the record stride like MappedParser does, so files without
+        line endings are indexed too.
+        '''
+        batches = []
+        entries = []
+        batch = None
+
+        with MappedParser(path) as mapped:
+            # Indexing and slicing the mmap itself is faster than going
+            # through its memoryview
+            buffer = mapped.mmap if mapped.mmap is not None else b''
+            stride = mapped.stride
+
+            entry_detail = ord(StreamParser.ENTRY_DETAIL)
+            addenda_record = ord(StreamParser.ADDENDA_RECORD)
+            batch_header = ord(StreamParser.BATCH_HEADER)
+            batch_control = ord(StreamParser.BATCH_CONTROL)
+            file_control = ord(StreamParser.FILE_CONTROL)
+
+            for offset in range(0, len(mapped) * stride, stride):
+                record_type = buffer[offset]
+
+                if record_type == entry_detail and batch is not None:
+                    entries.append([
+                        offset, 0, buffer[offset + 79:offset + 94]
+                    ])
+                elif record_type == addenda_record and batch is not None \
+                        and len(entries) > batch[2]:
+                    entries[-1][1] += 1
+                elif record_type == batch_header:
+                    batch = [
+                        offset, None, len(entries), 0,
+                        buffer[offset + 87:offset + 94]
+                    ]
+                elif record_type == batch_control and batch is not None:
+                    batch[1] = offset
+                    batch[3] = len(entries) - batch[2]
+                    batches.append(batch)
+                    batch = None
+                elif record_type == file_control:
+                    break
+
+        stat = os.stat(path)
+
+        parts = [cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION, stat.st_size, stat.st_mtime, stride,
+            len(batches), len(entries)
+        )]
+        parts.extend(starmap(cls.BATCH_RECORD.pack, batches))
+        # Sorted by batch id then batch index, the first batch of an id
+        # is found first
+        parts.extend(starmap(cls.BATCH_ID_RECORD.pack, sorted(
+            (batch[4], batch_index)
+            for batch_index, batch in enumerate(batches)
+        )))
+        parts.extend(starmap(cls.ENTRY_RECORD.pack, (
+            entry[:2] for entry in entries
+        )))
+        # Trace numbers are only unique within a batch for some
+        # originators, entries sharing one stay in file order
+        parts.extend(starmap(cls.TRACE_RECORD.pack, sorted(
+            (trace_num, offset, addenda_count)
+            for offset, addenda_count, trace_num in entries
+        )))
+
+        return cls(path, b''.join(parts))
+
+    @classmethod
+    def load(cls, path, index_path=None):
+        '''
+        Returns the index saved in the sidecar file, building and saving it
+        first if it is missing or the ACH file changed since
+        '''
+        index_path = index_path or path + cls.SIDECAR_SUFFIX
+        stat = os.stat(path)
+
+        try:
+            with open(index_path, 'rb') as index_file:
+                data = mmap.mmap(
+                    index_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except (IOError, OSError, ValueError):
+            data = None
+
+        if data is not None:
+            try:
+                index = cls(path, data)
+            except (ValueError, struct.error):
+                index = None
+
+            if index is not None and index.size == stat.st_size \
+                    and index.mtime == stat.st_mtime:
+                return index
+
+            data.close()
+
+        index = cls.build(path)
+        index.save(index_path)
+
+        return index
+
+    def save(self, index_path=None):
+        '''
+        Writes the index to its sidecar file
+        '''
+        index_path = index_path or self.path + self.SIDECAR_SUFFIX
+
+        with open(index_path, 'wb') as index_file:
+            index_file.write(self.data)
+
+    def close(self):
+        '''
+        Releases the memory mapped sidecar of a loaded index
+        '''
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def batch(self, batch_index):
+        '''
+        Returns the batch at `batch_index` in the same shape as a batch of
+        ``Parser.as_dict()``, reading only that batch from disk
+        '''
+        header_offset, control_offset = self.batches[batch_index][:2]
+
+        records = self.read_records(
+            header_offset, control_offset + RECORD_SIZE - header_offset
+        )
+
+        return Parser(records).as_dict()['batches'][0]
+
+    def batch_by_id(self, batch_id):
+        '''
+        Returns the batch whose batch header has `batch_id`
+        '''
+        batch_id = str(batch_id).zfill(7).encode('ascii')
+
+        for _, batch_index in self.batch_ids.find(batch_id):
+            return self.batch(batch_index)
+
+        raise KeyError(batch_id.decode('ascii'))
+
+    def entry(self, entry_index):
+        '''
+        Returns the entry at `entry_index` as a dict holding the
+        ``entry_detail`` and its ``addenda``
+        '''
+        return self.read_entry(*self.entries[entry_index])
+
+    def find_trace(self, trace_num):
+        '''
+        Returns the list of entries with the trace number `trace_num`
+        '''
+        trace_num = str(trace_num).zfill(15).encode('ascii')
+
+        return [
+            self.read_entry(offset, addenda_count)
+            for _, offset, addenda_count in self.trace_nums.find(trace_num)
+        ]
+
+    def read_entry(self, offset, addenda_count):
+        '''
+        Reads the entry detail at `offset` and the `addenda_count` addenda
+        records after it
+        '''
+        layouts = StreamParser.compiled_layouts()
+        lines = [
+            record.decode('ascii') for record in self.read_records(
+                offset, addenda_count * self.stride + RECORD_SIZE
+            )
+        ]
+
+        return {
+            'entry_detail': layouts['ENTRY_DETAIL_DEF'].parse(lines[0]),
+            'addenda': [
+                layouts['ADDENDA_RECORD_DEF'].parse(line)
+                for line in lines[1:]
+            ],
+        }
+
+    def read_records(self, offset, length):
+        '''
+        Reads `length` bytes of the ACH file from `offset` and returns the
+        records in them, without line endings
+        '''
+        with open(self.path, 'rb') as ach_file:
+            ach_file.seek(offset)
+            chunk = ach_file.read(length)
+
+        return [
+            chunk[start:start + RECORD_SIZE]
+            for start in range(0, len(chunk), self.stride)
+        ]
@@ -1,9 +1,186 @@
+import io
 import json
+import mmap
+import multiprocessing
+import os
+import re
+from operator import itemgetter
 
 
-class Parser(object):
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+# Every record in an ACH file is 94 characters wide
+RECORD_SIZE = 94
+
+
+def record_stride(data):
     '''
-    Parser for ACH files
+    Returns the distance in bytes between the starts of consecutive
+    records in `data`: the record size plus the width of the line ending
+    used after the first record
+    '''
+    end = data[RECORD_SIZE:RECORD_SIZE + 2]
+
+    if end == b'\r\n':
+        return RECORD_SIZE + 2
+    if end[:1] == b'\n':
+        return RECORD_SIZE + 1
+
+    return RECORD_SIZE
+
+
+class RecordView(Mapping):
+    '''
+    Read-only view of a single record line.
+
+    Holds only a reference to the raw line and slices a field out of it
+    when that field is read, either as ``view['amount']`` or
+    ``view.amount``. Being a ``Mapping`` it compares equal to the dict
+    ``RecordLayout.parse`` would return for the same line.
+    '''
+
+    __slots__ = ('line',)
+
+    field_slices = {}
+
+    def __init__(self, line):
+        self.line = line
+
+    def __getitem__(self, field):
+        return self.line[self.field_slices[field]]
+
+    def __iter__(self):
+        return iter(self.field_slices)
+
+    def __len__(self):
+        return len(self.field_slices)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.line)
+
+
+class BufferRecordView(RecordView):
+    '''
+    RecordView over a ``bytes`` or ``memoryview`` line, fields are decoded
+    to str as they are read
+    '''
+
+    __slots__ = ()
+
+    def __getitem__(self, field):
+        return bytes(self.line[self.field_slices[field]]).decode('ascii')
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, bytes(self.line))
+
+
+class RecordLayout(object):
+    '''
+    A ``*_DEF`` field list compiled once for fast field extraction.
+
+    ``extract`` is an ``itemgetter`` over precomputed slices that returns
+    all the fields of a line as a tuple in one call, ``parse`` is a
+    function generated from the layout that returns them as a dict and
+    ``view`` is a ``RecordView`` subclass for lazy access to the fields.
+    ``buffer_view`` is the same for lines held as ``bytes`` or
+    ``memoryview``.
+    '''
+
+    def __init__(self, definition, name='Record'):
+        self.fields = tuple(rule['field'] for rule in definition)
+        self.slices = tuple(
+            slice(rule['pos'], rule['pos'] + rule['len'])
+            for rule in definition
+        )
+        self.extract = itemgetter(*self.slices)
+        self.parse = self.__compile_parse(definition)
+        self.view = self.__compile_view(
+            name + 'View', RecordView, self.__field_getter
+        )
+        self.buffer_view = self.__compile_view(
+            name + 'BufferView', BufferRecordView, self.__buffer_field_getter
+        )
+
+    def __compile_parse(self, definition):
+        items = ', '.join(
+            '%r: line[%d:%d]' % (
+                rule['field'], rule['pos'], rule['pos'] + rule['len']
+            )
+            for rule in definition
+        )
+        namespace = {}
+        exec('def parse(line):\n    return {%s}\n' % items, namespace)
+
+        return namespace['parse']
+
+    def __compile_view(self, name, base, field_getter):
+        field_slices = dict(zip(self.fields, self.slices))
+        attrs = {'__slots__': (), 'field_slices': field_slices}
+
+        # Fields that are valid identifiers can also be read as attributes
+        for field, field_slice in field_slices.items():
+            if re.match(r'[A-Za-z_]\w*$', field):
+                attrs[field] = property(field_getter(field_slice))
+
+        return type(name, (base,), attrs)
+
+    @staticmethod
+    def __field_getter(field_slice):
+        def getter(view):
+            return view.line[field_slice]
+
+        return getter
+
+    @staticmethod
+    def __buffer_field_getter(field_slice):
+        def getter(view):
+            return bytes(view.line[field_slice]).decode('ascii')
+
+        return getter
+
+
+def as_text(value):
+    '''
+    Returns a field read in binary mode as str
+    '''
+    if isinstance(value, bytes):
+        return value.decode('ascii')
+
+    return value
+
+
+def json_default(value):
+    '''
+    ``default`` for ``json.dumps`` of parsed records: RecordViews are
+    dumped as dicts and the bytes fields of binary mode as ASCII str
+    '''
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('ascii')
+
+    return dict(value)
+
+
+class StreamParser(object):
+    '''
+    Streaming parser for ACH files
+
+    Accepts the file as a string, a text or binary file object, or any
+    iterable of lines, and yields ``(event, data)`` tuples one record at a
+    time so memory use stays flat no matter how large the file is. Events
+    are ``file_header``, ``batch_header``, ``entry``, ``batch_control`` and
+    ``file_control``. The data for an ``entry`` event is a dict holding the
+    ``entry_detail`` and its list of ``addenda``.
+
+    With ``binary=True`` lines are kept as ``bytes`` and every field is a
+    ``bytes`` slice of its line, so nothing is decoded.
+
+    With ``validate=True`` every batch control is checked against the
+    totals of its entries and the file control against the totals of the
+    batch controls as they are parsed. Mismatches are added to ``errors``,
+    as are batches without a batch control and a missing file control.
     '''
 
     FILE_HEADER = '1'
@@ -345,107 +522,677 @@ class Parser(object):
         '7': 'addenda_record',
     }
 
-    def __init__(self, ach_file):
+    # Parser states, the record type code of each line moves between them
+    IN_FILE = 0
+    IN_BATCH = 1
+    IN_ENTRY = 2
+
+    layout_names = (
+        'FILE_HEADER_DEF', 'FILE_CONTROL_DEF', 'BATCH_HEADER_DEF',
+        'BATCH_CONTROL_DEF', 'ENTRY_DETAIL_DEF', 'ADDENDA_RECORD_DEF',
+    )
+
+    def __init__(self, source, lazy=False, binary=False, validate=False):
+        self.source = source
+        self.lazy = lazy
+        self.binary = binary
+        self.validate = validate
+        self.errors = []
+        self.layouts = self.compiled_layouts()
+
+    @classmethod
+    def compiled_layouts(cls):
+        '''
+        Returns a dict of ``*_DEF`` name to its RecordLayout, the layouts
+        are compiled once per class
+        '''
+        layouts = cls.__dict__.get('_compiled_layouts')
+
+        if layouts is None:
+            layouts = {}
+            for name in cls.layout_names:
+                view_name = ''.join(
+                    word.capitalize() for word in name.split('_')[:-1]
+                )
+                layouts[name] = RecordLayout(getattr(cls, name), view_name)
+            cls._compiled_layouts = layouts
+
+        return layouts
+
+    def __iter__(self):
+        events = self._iter_events()
+
+        if self.validate:
+            return self.__reconcile(events)
+
+        return events
+
+    def _iter_events(self):
+        state = self.IN_FILE
+        seen_header = False
+        entry = None
+
+        # In lazy mode records are RecordView objects over the raw line
+        # rather than dicts of every field
+        method = 'view' if self.lazy else 'parse'
+
+        parse_file_header = getattr(self.layouts['FILE_HEADER_DEF'], method)
+        parse_file_control = getattr(self.layouts['FILE_CONTROL_DEF'], method)
+        parse_batch_header = getattr(self.layouts['BATCH_HEADER_DEF'], method)
+        parse_batch_control = getattr(
+            self.layouts['BATCH_CONTROL_DEF'], method
+        )
+        parse_entry_detail = getattr(self.layouts['ENTRY_DETAIL_DEF'], method)
+        parse_addenda_record = getattr(
+            self.layouts['ADDENDA_RECORD_DEF'], method
+        )
+
+        record_types = (
+            self.FILE_HEADER, self.FILE_CONTROL, self.BATCH_HEADER,
+            self.BATCH_CONTROL, self.ENTRY_DETAIL, self.ADDENDA_RECORD,
+        )
+
+        if self.binary:
+            record_types = [code.encode('ascii') for code in record_types]
+
+        file_header, file_control, batch_header, batch_control, \
+            entry_detail, addenda_record = record_types
+
+        for line in self._iter_lines():
+            if not line:
+                continue
+
+            # A slice rather than an index, indexing bytes gives an int
+            record_type = line[:1]
+
+            if state == self.IN_ENTRY:
+                if record_type == addenda_record:
+                    entry['addenda'].append(parse_addenda_record(line))
+                    continue
+
+                yield 'entry', entry
+                entry = None
+                state = self.IN_BATCH
+
+            if record_type == entry_detail:
+                if state == self.IN_BATCH:
+                    entry = {
+                        'entry_detail': parse_entry_detail(line),
+                        'addenda': [],
+                    }
+                    state = self.IN_ENTRY
+
+            elif record_type == batch_header:
+                state = self.IN_BATCH
+                yield 'batch_header', parse_batch_header(line)
+
+            elif record_type == batch_control:
+                if state == self.IN_BATCH:
+                    state = self.IN_FILE
+                    yield 'batch_control', parse_batch_control(line)
+
+            elif record_type == file_header:
+                if not seen_header:
+                    seen_header = True
+                    yield 'file_header', parse_file_header(line)
+
+            elif record_type == file_control:
+                # Only the first '9' record is the file control, the rest
+                # are block filler
+                yield 'file_control', parse_file_control(line)
+                break
+
+        if entry is not None:
+            yield 'entry', entry
+
+    def __reconcile(self, events):
+        '''
+        Passes `events` through while keeping running totals of the entries
+        of each batch and of the batch controls, and checks them when the
+        batch control and file control records arrive
+        '''
+        self.errors = []
+
+        batch_index = -1
+        # None outside a batch, so a batch header or file control that
+        # arrives while it is set means the batch had no batch control
+        batch_totals = None
+        file_totals = [0, 0, 0, 0, 0]
+        seen_file_control = False
+
+        for event, data in events:
+            if event == 'entry':
+                entry_detail = data['entry_detail']
+                batch_totals[0] += 1 + len(data['addenda'])
+                batch_totals[1] += self.__number(
+                    entry_detail, 'recv_dfi_id', batch_index
+                )
+
+                # The last digit of every transaction code tells credits,
+                # 0 to 4, from debits, 5 to 9. This covers returns,
+                # notifications of change and zero dollar entries too.
+                transaction_code = as_text(entry_detail['transaction_code'])
+
+                if not transaction_code.isdigit():
+                    self.__add_error(
+                        entry_detail, 'transaction_code', None,
+                        transaction_code, batch_index
+                    )
+                elif transaction_code[-1] < '5':
+                    batch_totals[3] += self.__number(
+                        entry_detail, 'amount', batch_index
+                    )
+                else:
+                    batch_totals[2] += self.__number(
+                        entry_detail, 'amount', batch_index
+                    )
+
+            elif event == 'batch_header':
+                if batch_totals is not None:
+                    self.__add_missing(self.BATCH_CONTROL, batch_index)
+
+                batch_index += 1
+                batch_totals = [0, 0, 0, 0]
+
+            elif event == 'batch_control':
+                batch_totals[1] %= 10 ** 10
+                fields = ('entadd_count', 'entry_hash', 'debit_amount',
+                          'credit_amount')
+
+                for field, total in zip(fields, batch_totals):
+                    self.__check(data, field, total, batch_index)
+
+                # Fields that are not numeric were reported just above
+                file_totals[0] += 1
+                for number, field in enumerate(fields, 1):
+                    value = as_text(data[field])
+                    if value.isdigit():
+                        file_totals[number] += int(value)
+
+                batch_totals = None
+
+            elif event == 'file_control':
+                if batch_totals is not None:
+                    self.__add_missing(self.BATCH_CONTROL, batch_index)
+                    batch_totals = None
+
+                seen_file_control = True
+                lines = 2 + 2 * file_totals[0] + file_totals[1]
+                file_totals[2] %= 10 ** 10
+
+                self.__check(data, 'batch_count', file_totals[0])
+                self.__check(data, 'block_count', -(-lines // 10))
+                self.__check(data, 'entadd_count', file_totals[1])
+                self.__check(data, 'entry_hash', file_totals[2])
+                self.__check(data, 'debit_amount', file_totals[3])
+                self.__check(data, 'credit_amount', file_totals[4])
+
+            yield event, data
+
+        if batch_totals is not None:
+            self.__add_missing(self.BATCH_CONTROL, batch_index)
+
+        if not seen_file_control:
+            self.__add_missing(self.FILE_CONTROL, None)
+
+    def __number(self, record, field, batch_index=None):
+        '''
+        Returns a numeric field as an int, reporting it and counting it as
+        0 if it is not numeric
+        '''
+        value = as_text(record[field])
+
+        if value.isdigit():
+            return int(value)
+
+        self.__add_error(record, field, None, value, batch_index)
+
+        return 0
+
+    def __check(self, record, field, expected, batch_index=None):
+        value = as_text(record[field])
+
+        if not value.isdigit() or int(value) != expected:
+            self.__add_error(
+                record, field, str(expected).zfill(len(value)), value,
+                batch_index
+            )
+
+    def __add_error(self, record, field, expected, found, batch_index):
+        record_type = as_text(record['record_type_code'])
+
+        self.errors.append({
+            'record': self.record_type_codes[record_type],
+            'batch_index': batch_index,
+            'field': field,
+            'expected': expected,
+            'found': found,
+        })
+
+    def __add_missing(self, record_type, batch_index):
+        '''
+        Reports a record that never arrived, a batch control or the file
+        control
+        '''
+        self.errors.append({
+            'record': self.record_type_codes[record_type],
+            'batch_index': batch_index,
+            'field': 'record_type_code',
+            'expected': record_type,
+            'found': None,
+        })
+
+    def write_ndjson(self, fileobj, encoder=None):
+        '''
+        Writes one JSON document per entry to `fileobj` as the file is
+        parsed, each with its ``batch_index`` and ``batch_header`` attached.
+        Returns the number of entries written.
+
+        `encoder` turns a dict into a str or bytes document (``orjson.dumps``
+        for example) and defaults to a compact ``json`` encoder. `fileobj`
+        can be a text or binary file.
+        '''
+        if encoder is None:
+            encoder = json.JSONEncoder(
+                separators=(',', ':'), default=json_default
+            ).encode
+
+        binary = not isinstance(fileobj, io.TextIOBase)
+        newline = b'\n' if binary else '\n'
+        write = fileobj.write
+        batch_index = -1
+        batch_header = None
+        count = 0
+
+        for event, data in self:
+            if event == 'entry':
+                line = encoder({
+                    'batch_index': batch_index,
+                    'batch_header': batch_header,
+                    'entry_detail': data['entry_detail'],
+                    'addenda': data['addenda'],
+                })
+
+                if binary and not isinstance(line, bytes):
+                    line = line.encode('utf-8')
+                elif not binary and isinstance(line, bytes):
+                    line = line.decode('utf-8')
+
+                write(line + newline)
+                count += 1
+
+            elif event == 'batch_header':
+                batch_index += 1
+                batch_header = data
+
+        return count
+
+    def _iter_lines(self):
+        '''
+        Returns an iterator over the lines of the source as str, or bytes
+        in binary mode. Line endings are left in place, fields are sliced
+        by position so they never reach the parsed values.
+        '''
+        source = self.source
+
+        if self.binary:
+            if isinstance(source, str):
+                source = source.encode('ascii')
+            if isinstance(source, (bytes, bytearray)):
+                return iter(source.split(b'\n'))
+
+            return self.__encode_lines(source)
+
+        if isinstance(source, str):
+            return iter(source.split('\n'))
+        if isinstance(source, bytes):
+            source = source.split(b'\n')
+
+        return self.__decode_lines(source)
+
+    def __decode_lines(self, lines):
+        for line in lines:
+            if not isinstance(line, str):
+                line = line.decode('ascii')
+
+            yield line
+
+    def __encode_lines(self, lines):
+        for line in lines:
+            if isinstance(line, str):
+                line = line.encode('ascii')
+
+            yield line
+
+
+class Parser(StreamParser):
+    '''
+    Parser for ACH files
+
+    Builds the whole file as a nested dict by consuming the events of
+    ``StreamParser``. ``ach_file`` can be anything ``StreamParser`` accepts.
+    With ``lazy=True`` every record is a ``RecordView`` that only decodes
+    the fields that are read, with ``binary=True`` fields are ``bytes``
+    and with ``validate=True`` control total mismatches are in ``errors``.
+    '''
+
+    def __init__(self, ach_file, lazy=False, binary=False, validate=False):
+        super(Parser, self).__init__(
+            ach_file, lazy=lazy, binary=binary, validate=validate
+        )
         self.ach_file = ach_file
-        self.ach_lines = ach_file.split('\n')
         self.ach_data = {}
 
         self.__parse_file()
 
     def as_json(self):
-        return json.dumps(self.ach_data)
+        return json.dumps(self.ach_data, default=json_default)
 
     def as_dict(self):
         return self.ach_data
 
     def __parse_file(self):
-        self.__parse_file_header()
-        self.__parse_file_control()
+        file_header = None
+        file_control = None
+        batches = []
+        batch = None
 
-        batch_info = self.__get_batch_info()
-        self.__parse_batches(batch_info)
+        for event, data in self:
+            if event == 'entry':
+                batch['entries'].append(data)
+            elif event == 'batch_header':
+                batch = {'batch_header': data, 'entries': []}
+            elif event == 'batch_control':
+                batches.append({
+                    'batch_header': batch['batch_header'],
+                    'batch_control': data,
+                    'entries': batch['entries'],
+                })
+            elif event == 'file_header':
+                file_header = data
+            elif event == 'file_control':
+                file_control = data
 
-    def __parse_line(self, line, record_type):
-        defintions = getattr(self, record_type)
-        record_data = {}
+        if file_header is not None:
+            self.ach_data['file_header'] = file_header
+        if file_control is not None:
+            self.ach_data['file_control'] = file_control
+        self.ach_data['batches'] = batches
 
-        for rule in defintions:
-            value = line[rule['pos']:rule['pos'] + rule['len']]
-            record_data[rule['field']] = value
 
-        return record_data
+class MappedParser(object):
+    '''
+    Random access parser for ACH files on disk
 
-    def __parse_file_header(self):
-        for line in self.ach_lines:
-            if line:
-                if line[0] == self.FILE_HEADER:
-                    self.ach_data['file_header'] = self.__parse_line(
-                        line, 'FILE_HEADER_DEF'
-                    )
-                    break
-
-    def __parse_file_control(self):
-        for line in self.ach_lines:
-            if line:
-                if line[0] == self.FILE_CONTROL:
-                    self.ach_data['file_control'] = self.__parse_line(
-                        line, 'FILE_CONTROL_DEF'
-                    )
-                    break
+    The file is memory mapped and records are exposed as ``memoryview``
+    slices of the mapping, so nothing is copied until a field is read.
+    Records are fixed width, so record N starts at N times the record
+    width plus line ending. Batches are located by reading only the
+    record type code of each record, and only as far as the requested
+    batch.
 
-    def __get_batch_info(self):
-        batches = []
+    Record views keep the mapping alive; drop them before calling
+    ``close``.
+    '''
+
+    RECORD_SIZE = RECORD_SIZE
+
+    def __init__(self, path):
+        self.path = path
+        self.layouts = StreamParser.compiled_layouts()
+
+        # An empty file cannot be mapped, it simply has no records
+        if os.path.getsize(path):
+            with open(path, 'rb') as ach_file:
+                self.mmap = mmap.mmap(
+                    ach_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            self.buffer = memoryview(self.mmap)
+        else:
+            self.mmap = None
+            self.buffer = memoryview(b'')
+
+        self.stride = record_stride(self.buffer)
+        self.record_count = (
+            len(self.buffer) + self.stride - self.RECORD_SIZE
+        ) // self.stride
+
+        # (batch header index, batch control index) of the batches found so
+        # far, and the record index the batch scan has reached
+        self.__batch_bounds = []
+        self.__scan_index = 0
+
+    def __len__(self):
+        return self.record_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.buffer.release()
+
+        if self.mmap is not None:
+            self.mmap.close()
+
+    def record(self, index):
+        '''
+        Returns the raw record at `index` as a memoryview
+        '''
+        start = self.__record_start(index)
+
+        return self.buffer[start:start + self.RECORD_SIZE]
+
+    def record_type(self, index):
+        '''
+        Returns the record type code of the record at `index`
+        '''
+        return chr(self.buffer[self.__record_start(index)])
+
+    def __record_start(self, index):
+        '''
+        Returns the offset of the record at `index`, counting negative
+        indexes from the end like a list
+        '''
+        if index < 0:
+            index += self.record_count
+        if not 0 <= index < self.record_count:
+            raise IndexError('record index out of range')
+
+        return index * self.stride
+
+    def view(self, index):
+        '''
+        Returns a lazy RecordView of the record at `index`
+        '''
+        record_type = self.record_type(index)
+        name = StreamParser.record_type_codes.get(record_type)
+
+        if name is None:
+            raise IndexError('record %s has no record type code' % index)
+
+        layout = self.layouts[name.upper() + '_DEF']
+
+        return layout.buffer_view(self.record(index))
+
+    def file_header(self):
+        return self.view(0)
+
+    def file_control(self):
+        '''
+        Returns the file control record, the first of the trailing '9'
+        records, or None if the file does not end with one
+        '''
+        index = self.record_count - 1
+
+        if index < 1 or self.record_type(index) != StreamParser.FILE_CONTROL:
+            return None
+
+        while index > 1 and self.record_type(index - 1) == '9':
+            index -= 1
+
+        return self.view(index)
+
+    def batch_bounds(self, batch_index):
+        '''
+        Returns the record indexes of the batch header and batch control of
+        the batch at `batch_index`, scanning forward only as far as needed
+        '''
+        bounds = self.__batch_bounds
+        buffer = self.buffer
+        stride = self.stride
+        header_index = None
+
+        batch_header = ord(StreamParser.BATCH_HEADER)
+        batch_control = ord(StreamParser.BATCH_CONTROL)
+        file_control = ord(StreamParser.FILE_CONTROL)
+
+        while len(bounds) <= batch_index:
+            index = self.__scan_index
+
+            if index >= self.record_count:
+                raise IndexError('batch index out of range')
+
+            record_type = buffer[index * stride]
+
+            if record_type == batch_header:
+                header_index = index
+            elif record_type == batch_control and header_index is not None:
+                bounds.append((header_index, index))
+                header_index = None
+            elif record_type == file_control:
+                self.__scan_index = self.record_count
+                continue
+
+            self.__scan_index = index + 1
+
+        return bounds[batch_index]
+
+    def batch_count(self):
+        '''
+        Returns the number of batches in the file, scanning all of it
+        '''
+        try:
+            self.batch_bounds(self.record_count)
+        except IndexError:
+            pass
+
+        return len(self.__batch_bounds)
+
+    def batch(self, batch_index):
+        '''
+        Returns the batch at `batch_index` in the same shape as a batch of
+        ``Parser.as_dict()``, with RecordView records
+        '''
+        header_index, control_index = self.batch_bounds(batch_index)
+        entries = []
+
+        for index in range(header_index + 1, control_index):
+            record_type = self.record_type(index)
+
+            if record_type == StreamParser.ENTRY_DETAIL:
+                entries.append({
+                    'entry_detail': self.view(index),
+                    'addenda': [],
+                })
+            elif record_type == StreamParser.ADDENDA_RECORD and entries:
+                entries[-1]['addenda'].append(self.view(index))
+
+        return {
+            'batch_header': self.view(header_index),
+            'batch_control': self.view(control_index),
+            'entries': entries,
+        }
+
+    def iter_batches(self):
+        '''
+        Yields every batch in the file in order
+        '''
+        batch_index = 0
+
+        while True:
+            try:
+                yield self.batch(batch_index)
+            except IndexError:
+                return
+
+            batch_index += 1
+
+
+def parse_parallel(path, processes=None, chunks_per_process=4):
+    '''
+    Parses the ACH file at `path` across a pool of worker processes and
+    returns the same structure as ``Parser.as_dict()``.
+
+    Batch boundaries are found from the record type codes of the memory
+    mapped file. Contiguous runs of batches are then handed to the workers
+    as byte ranges of the file, and each worker maps the file itself, so
+    no file content is pickled on the way in.
+    '''
+    processes = processes or multiprocessing.cpu_count()
+
+    with MappedParser(path) as mapped:
+        ach_data = {}
+
+        # Like Parser, an empty file gives no file header
+        if len(mapped):
+            ach_data['file_header'] = dict(mapped.file_header())
+
+        # Views keep the mapping alive, so nothing but the dict is kept
+        if mapped.file_control() is not None:
+            ach_data['file_control'] = dict(mapped.file_control())
+
+        batch_count = mapped.batch_count()
+        bounds = [mapped.batch_bounds(index) for index in range(batch_count)]
+        stride = mapped.stride
+
+    # Group consecutive batches into byte ranges of about equal size
+    ranges = []
+
+    if bounds:
+        chunk_count = min(len(bounds), processes * chunks_per_process)
+        chunk_size = float(bounds[-1][1] - bounds[0][0] + 1) / chunk_count
+        last = len(bounds) - 1
+        start = None
+
+        for number, (header_index, control_index) in enumerate(bounds):
+            if start is None:
+                start = header_index
+
+            if control_index - start + 1 >= chunk_size or number == last:
+                ranges.append((
+                    path, start * stride, control_index * stride + RECORD_SIZE
+                ))
+                start = None
+
+    if processes == 1 or len(ranges) <= 1:
+        results = [_parse_batch_range(batch_range) for batch_range in ranges]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_parse_batch_range, ranges)
+        finally:
+            pool.close()
+            pool.join()
+
+    ach_data['batches'] = [batch for batches in results for batch in batches]
+
+    return ach_data
+
+
+def _parse_batch_range(batch_range):
+    '''
+    Worker for ``parse_parallel``, parses the batches in one byte range of
+    the file
+    '''
+    path, start, end = batch_range
+
+    with open(path, 'rb') as ach_file:
+        ach_mmap = mmap.mmap(ach_file.fileno(), 0, access=mmap.ACCESS_READ)
 
-        for line_num, line in enumerate(self.ach_lines):
-            if line:
-                if line[0] == self.BATCH_HEADER:
-                    batches.append({
-                        'batch_header_line': line_num,
-                    })
-                if line[0] == self.BATCH_CONTROL:
-                    batches[len(batches) - 1]['batch_control_line'] = line_num
-
-        return batches
-
-    def __parse_batches(self, batch_info):
-        self.ach_data['batches'] = []
-
-        for batch in batch_info:
-            self.ach_data['batches'].append({
-                'batch_header': self.__parse_line(
-                    self.ach_lines[batch['batch_header_line']],
-                    'BATCH_HEADER_DEF'
-                ),
-                'batch_control': self.__parse_line(
-                    self.ach_lines[batch['batch_control_line']],
-                    'BATCH_CONTROL_DEF'
-                ),
-                'entries': [],
-            })
-
-            start = batch['batch_header_line'] + 1
-            stop = batch['batch_control_line']
-
-            for line_num in range(start, stop):
-                if self.ach_lines[line_num]:
-                    cur_batch = len(self.ach_data['batches']) - 1
-                    cur_entry = len(
-                        self.ach_data['batches'][cur_batch]['entries']
-                    ) - 1
-
-                    if self.ach_lines[line_num][0] == self.ENTRY_DETAIL:
-                        self.ach_data['batches'][cur_batch]['entries'].append({
-                            'entry_detail': self.__parse_line(
-                                self.ach_lines[line_num],
-                                'ENTRY_DETAIL_DEF'
-                            ),
-                            'addenda': []
-                        })
-                    if self.ach_lines[line_num][0] == self.ADDENDA_RECORD:
-                        self.ach_data['batches'][cur_batch]['entries'][
-                            cur_entry
-                        ]['addenda'].append(
-                            self.__parse_line(
-                                self.ach_lines[line_num], 'ADDENDA_RECORD_DEF'
-                            )
-                        )
+    try:
+        return Parser(ach_mmap[start:end]).as_dict()['batches']
+    finally:
+        ach_mmap.close()
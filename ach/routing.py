@@ -0,0 +1,135 @@
+"""
+ABA routing number check digits, for one routing number or whole columns
+
+The check digit is the 9th digit of a routing number. The first 8 digits
+are weighted 3, 7, 1, 3, 7, 1, 3, 7 and the check digit brings the sum up
+to a multiple of 10. Rather than weighting digit by digit, the weighted
+sums of each half of the 8 digits are looked up in a table of all 10000
+4 digit numbers.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .data_types import AchError
+
+
+ABA_WEIGHTS = (3, 7, 1, 3, 7, 1, 3, 7)
+
+
+def weighted_sums(weights):
+    """
+    Returns the weighted digit sum, mod 10, of every 4 digit number
+    """
+    return [
+        sum(int(digit) * weight for digit, weight in zip('%04d' % number,
+                                                        weights)) % 10
+        for number in range(10000)
+    ]
+
+
+HIGH_SUMS = weighted_sums(ABA_WEIGHTS[:4])
+LOW_SUMS = weighted_sums(ABA_WEIGHTS[4:])
+
+
+def check_digit(routing_number):
+    """
+    Returns the check digit (str) of a routing number. Only its first 8
+    digits are used, shorter ones are zero padded to 8 like
+    EntryDetail.recv_dfi_id.
+    """
+    routing_number = str(routing_number).zfill(8)
+
+    if not routing_number[:8].isdigit():
+        raise AchError("routing number needs to be numeric characters only")
+
+    total = HIGH_SUMS[int(routing_number[:4])] \
+        + LOW_SUMS[int(routing_number[4:8])]
+
+    return str(-total % 10)
+
+
+def check_digits(routing_numbers):
+    """
+    Computes the check digits of a column (list or NumPy array) of routing
+    numbers.
+
+    Returns (digits, errors): a list of check digits, or an array of str
+    when given an array, and the indexes of the routing numbers that are
+    not numeric or longer than 9 digits. Failing rows are None in a list.
+    """
+    if np is not None and isinstance(routing_numbers, np.ndarray):
+        digits, valid = digit_matrix(routing_numbers, 8)
+        totals = digits[:, :8].dot(np.array(ABA_WEIGHTS, dtype=np.int64))
+
+        return (-totals % 10).astype(str), np.flatnonzero(~valid).tolist()
+
+    digits = []
+    errors = []
+
+    for index, routing_number in enumerate(routing_numbers):
+        routing_number = str(routing_number)
+
+        if routing_number.isdigit() and len(routing_number) <= 9:
+            routing_number = routing_number.zfill(8)
+            digits.append(str(-(
+                HIGH_SUMS[int(routing_number[:4])]
+                + LOW_SUMS[int(routing_number[4:8])]
+            ) % 10))
+        else:
+            digits.append(None)
+            errors.append(index)
+
+    return digits, errors
+
+
+def verify_routing_numbers(routing_numbers):
+    """
+    Returns the indexes of every routing number in a column (list or NumPy
+    array) that is not 9 digits with a matching check digit. Use it to
+    check routing numbers before they are used in a batch.
+    """
+    if np is not None and isinstance(routing_numbers, np.ndarray):
+        digits, valid = digit_matrix(routing_numbers, 9)
+        totals = digits.dot(np.array(ABA_WEIGHTS + (1,), dtype=np.int64))
+
+        return np.flatnonzero(~valid | (totals % 10 != 0)).tolist()
+
+    errors = []
+
+    for index, routing_number in enumerate(routing_numbers):
+        routing_number = str(routing_number)
+
+        if len(routing_number) != 9 or not routing_number.isdigit() \
+                or (HIGH_SUMS[int(routing_number[:4])]
+                    + LOW_SUMS[int(routing_number[4:8])]
+                    + int(routing_number[8])) % 10:
+            errors.append(index)
+
+    return errors
+
+
+def digit_matrix(routing_numbers, width):
+    """
+    Returns a 2D int64 array of the digits of an array of routing numbers
+    zero padded to `width`, with one row per routing number, and a boolean
+    array of which rows were valid. Invalid rows are all zeros.
+    """
+    if routing_numbers.dtype.kind == 'S':
+        routing_numbers = np.char.decode(routing_numbers, 'ascii', 'replace')
+    else:
+        routing_numbers = routing_numbers.astype(str)
+
+    valid = np.char.isdigit(routing_numbers) \
+        & (np.char.str_len(routing_numbers) <= 9)
+
+    if width == 9:
+        valid &= np.char.str_len(routing_numbers) == 9
+
+    padded = np.char.zfill(np.where(valid, routing_numbers, ''), width)
+    raw = np.char.encode(padded, 'ascii').astype('S9')
+    # 'S' arrays drop trailing NUL bytes, so the width is fixed by astype
+    digits = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(-1, 9)
+
+    return digits[:, :width].astype(np.int64) - ord('0'), valid
@@ -0,0 +1,73 @@
+"""
+Row templates with the constant fields of a record rendered once
+
+Most of an entry detail row is the same for every entry of a batch: the
+record type code, the blank fields of its SEC code and the start of the
+trace number. A template renders those once and fills in only the fields
+that vary, straight from columns of padded values, so a whole batch can be
+rendered without building a record per entry.
+"""
+
+
+class RowTemplate(object):
+    """
+    A row of `record` with every field but `variable_fields` fixed to the
+    record's current values
+    """
+
+    def __init__(self, record, variable_fields):
+        """
+        args: record (Ach record with get_row_fields), variable_fields
+        (List[str]) names of the fields filled in per row
+        """
+        self.fields = []
+        self.widths = {}
+
+        pieces = []
+
+        for field in record.get_row_fields():
+            value = getattr(record, field)
+
+            if field in variable_fields:
+                self.fields.append(field)
+                self.widths[field] = len(value)
+                pieces.append('%s')
+            else:
+                pieces.append(value.replace('%', '%%'))
+
+        missing = set(variable_fields) - set(self.fields)
+
+        if missing:
+            raise ValueError(
+                '%s not in the row fields' % ', '.join(sorted(missing))
+            )
+
+        self.format = ''.join(pieces)
+
+    def render(self, values):
+        """
+        Returns the row for `values`, a tuple of the padded variable fields
+        in row order (see `fields`)
+        """
+        return self.format % values
+
+    def render_rows(self, columns):
+        """
+        Returns the rows for `columns`, a dict of the variable fields to
+        lists or NumPy arrays of padded values, one per row
+        """
+        row_format = self.format
+        columns = [as_list(columns[field]) for field in self.fields]
+
+        return [row_format % values for values in zip(*columns)]
+
+
+def as_list(column):
+    """
+    Returns a column as a list, NumPy arrays are converted so their values
+    are plain str
+    """
+    if hasattr(column, 'tolist'):
+        return column.tolist()
+
+    return column
@@ -0,0 +1,198 @@
+"""
+Validation of whole columns of entry fields at once
+
+The record classes validate one field of one record at a time and raise
+AchError on the first bad value. The functions here take a column (a list
+or NumPy array) of one field for a whole batch, pad every value the same
+way the records do and return the index of every row that failed, so a
+batch of bad data can be reported in one pass.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .data_types import alpha_numeric_pattern
+
+
+# Entry dict keys used by AchFile.add_batch and the EntryDetail field each
+# of them is validated as
+ENTRY_FIELDS = (
+    ('type', 'transaction_code'),
+    ('routing_number', 'recv_dfi_id'),
+    ('account_number', 'dfi_acnt_num'),
+    ('amount', 'amount'),
+    ('name', 'ind_name'),
+)
+
+
+def is_array(values):
+    return np is not None and isinstance(values, np.ndarray)
+
+
+def numeric_column(values, length, pad_length=None):
+    """
+    Validates a column of numeric fields of up to `length` digits and zero
+    pads them to `pad_length` (`length` by default).
+
+    Returns (padded, errors). `padded` is a list, or an array of str when
+    `values` is a NumPy array, and `errors` lists the index of every row
+    that is not all digits or is too long. Failing rows are None in a list.
+    """
+    pad_length = pad_length or length
+
+    if is_array(values):
+        return numeric_array(values, length, pad_length)
+
+    padded = []
+    errors = []
+
+    for index, value in enumerate(values):
+        value = str(value)
+
+        if value.isdigit() and len(value) <= length:
+            padded.append(value.zfill(pad_length))
+        else:
+            padded.append(None)
+            errors.append(index)
+
+    return padded, errors
+
+
+def numeric_array(values, length, pad_length):
+    """
+    NumPy version of numeric_column, every check is done on the whole array
+    """
+    if values.dtype.kind in 'iu':
+        valid = (values >= 0) & (values < 10 ** length)
+        values = values.astype(str)
+    else:
+        if values.dtype.kind == 'S':
+            values = np.char.decode(values, 'ascii', 'replace')
+        else:
+            values = values.astype(str)
+
+        valid = np.char.isdigit(values) & (np.char.str_len(values) <= length)
+
+    return np.char.zfill(values, pad_length), np.flatnonzero(~valid).tolist()
+
+
+def alpha_numeric_column(values, length):
+    """
+    Validates a column of alpha numeric fields, truncating and space padding
+    them to `length` and upper casing them.
+
+    Returns (padded, errors) like numeric_column. There is no NumPy version
+    of the pattern match, arrays are matched row by row with the compiled
+    pattern but without building a record per row.
+    """
+    if is_array(values):
+        values = values.tolist()
+
+    match = alpha_numeric_pattern(length).match
+
+    padded = []
+    errors = []
+
+    for index, value in enumerate(values):
+        if isinstance(value, bytes):
+            value = value.decode('ascii', 'replace')
+
+        try:
+            found = match(value)
+        except TypeError:
+            found = None
+
+        if found:
+            padded.append(found.group().ljust(length).upper())
+        else:
+            padded.append(None)
+            errors.append(index)
+
+    return padded, errors
+
+
+def routing_number_column(values):
+    """
+    Validates a column of routing numbers. Like EntryDetail.recv_dfi_id
+    they are 8 digits without the check digit or 9 with it, shorter ones
+    are zero padded to 8.
+    """
+    return numeric_column(values, 9, 8)
+
+
+def amount_column(values):
+    """
+    Validates a column of dollar amounts and converts them to the 10 digit
+    amount in cents of an entry detail record
+    """
+    if is_array(values) and values.dtype.kind in 'iuf':
+        cents = np.round(values * 100.0)
+        invalid = ~np.isfinite(cents)
+        cents = np.where(invalid, -1, cents).astype(np.int64)
+
+        return numeric_column(cents, 10)
+
+    cents = []
+
+    for value in values:
+        try:
+            cents.append(int(round(float(value) * 100)))
+        except (TypeError, ValueError, OverflowError):
+            # Fails the numeric check below
+            cents.append(-1)
+
+    return numeric_column(cents, 10)
+
+
+def validate_entry_columns(columns, std_ent_cls_code='PPD'):
+    """
+    Validates and pads whole columns of entry fields in one pass.
+
+    columns: dict of the entry keys AchFile.add_batch takes ('type',
+    'routing_number', 'account_number', 'amount' and 'name') to lists or
+    NumPy arrays of one value per entry. Missing keys are skipped.
+
+    Returns (fields, errors). `fields` maps the EntryDetail field names to
+    the padded columns, and `errors` maps them to the indexes of every row
+    that failed. All the columns are checked, nothing is raised.
+    """
+    if std_ent_cls_code in ['CIE', 'MTE']:
+        name_length = 15
+    else:
+        name_length = 22
+
+    validators = {
+        'transaction_code': lambda values: numeric_column(values, 2),
+        'recv_dfi_id': routing_number_column,
+        'dfi_acnt_num': lambda values: alpha_numeric_column(values, 17),
+        'amount': amount_column,
+        'ind_name': lambda values: alpha_numeric_column(values, name_length),
+    }
+
+    fields = {}
+    errors = {}
+
+    for key, field in ENTRY_FIELDS:
+        if key not in columns:
+            continue
+
+        fields[field], failed = validators[field](columns[key])
+
+        if failed:
+            errors[field] = failed
+
+    return fields, errors
+
+
+def failed_rows(errors):
+    """
+    Returns the sorted indexes of the rows with at least one failing field
+    in the errors returned by validate_entry_columns
+    """
+    rows = set()
+
+    for indexes in errors.values():
+        rows.update(indexes)
+
+    return sorted(rows)
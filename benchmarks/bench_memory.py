@@ -0,0 +1,53 @@
+"""
+Compares the memory used by the record classes in ach.data_types with
+their __slots__ based Compact* copies.
+
+    python -m benchmarks.bench_memory
+"""
+import tracemalloc
+
+from ach import data_types as dt
+
+COUNT = 10000
+
+RECORDS = [
+    ('Header', lambda cls: cls(
+        '123456789', '123456789', 'A', 'YOUR BANK', 'YOUR COMPANY'
+    )),
+    ('BatchHeader', lambda cls: cls(company_name='YOUR COMPANY')),
+    ('BatchControl', lambda cls: cls()),
+    ('EntryDetail', lambda cls: cls(
+        'PPD', transaction_code='22', recv_dfi_id='12345678',
+        dfi_acnt_num='11232132', amount=1000, ind_name='ALICE'
+    )),
+    ('AddendaRecord', lambda cls: cls(pmt_rel_info='INVOICE 1')),
+]
+
+
+def measure(factory, cls):
+    tracemalloc.start()
+    records = [factory(cls) for _ in range(COUNT)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del records
+
+    return size / float(COUNT)
+
+
+def main():
+    print('%-15s %14s %14s %8s' % (
+        'record', 'dict (bytes)', 'slots (bytes)', 'ratio'
+    ))
+
+    for name, factory in RECORDS:
+        regular = measure(factory, getattr(dt, name))
+        compact = measure(factory, getattr(dt, 'Compact' + name))
+
+        print('%-15s %14.0f %14.0f %8.2f' % (
+            name, regular, compact, regular / compact
+        ))
+
+
+if __name__ == '__main__':
+    main()
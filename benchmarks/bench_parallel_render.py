@@ -0,0 +1,68 @@
+"""
+Compares building and rendering streamed batches in this process with
+AchFile.render_parallel over a growing number of worker processes.
+
+    python -m benchmarks.bench_parallel_render
+"""
+import multiprocessing
+import time
+from datetime import datetime
+
+from ach.builder import AchFile
+
+from .common import SETTINGS, make_entries
+
+NUM_BATCHES = 200
+ENTRIES_PER_BATCH = 1000
+
+
+def make_streamed_file(entries):
+    ach_file = AchFile('A', SETTINGS)
+
+    for _ in range(NUM_BATCHES):
+        ach_file.add_batch(
+            'PPD', entries, credits=True, debits=True,
+            eff_ent_date=datetime(2020, 1, 2), stream=True
+        )
+
+    return ach_file
+
+
+def best_time(render):
+    """
+    Streamed files render only once, so each run gets a new file
+    """
+    entries = make_entries(ENTRIES_PER_BATCH)
+    best = None
+
+    for _ in range(3):
+        ach_file = make_streamed_file(entries)
+        start = time.time()
+        render(ach_file)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    print('%d batches of %d entries, %d CPUs' % (
+        NUM_BATCHES, ENTRIES_PER_BATCH, multiprocessing.cpu_count()
+    ))
+    print('%-14s %10s' % ('render', 'time (s)'))
+
+    print('%-14s %10.2f' % (
+        'in process', best_time(lambda ach_file: ach_file.render_to_string())
+    ))
+
+    processes = 2
+    while processes <= max(2, multiprocessing.cpu_count()):
+        print('%-14s %10.2f' % (
+            '%d processes' % processes,
+            best_time(lambda ach_file: ach_file.render_parallel(processes))
+        ))
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main()
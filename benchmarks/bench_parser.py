@@ -0,0 +1,96 @@
+"""
+Compares the single-pass Parser with the multi-scan algorithm it replaced.
+
+    python -m benchmarks.bench_parser
+"""
+import timeit
+
+from ach.parser import Parser
+
+from .common import make_ach_string
+
+
+def legacy_parse(ach_file):
+    """
+    The previous Parser algorithm: one scan each for the file header, the
+    file control and the batch boundaries, then one more over every batch.
+    """
+    lines = ach_file.split('\n')
+
+    def parse_line(line, definition):
+        record_data = {}
+        for rule in getattr(Parser, definition):
+            value = line[rule['pos']:rule['pos'] + rule['len']]
+            record_data[rule['field']] = value
+        return record_data
+
+    data = {}
+    for line in lines:
+        if line and line[0] == '1':
+            data['file_header'] = parse_line(line, 'FILE_HEADER_DEF')
+            break
+    for line in lines:
+        if line and line[0] == '9':
+            data['file_control'] = parse_line(line, 'FILE_CONTROL_DEF')
+            break
+
+    batch_info = []
+    for line_num, line in enumerate(lines):
+        if line and line[0] == '5':
+            batch_info.append({'batch_header_line': line_num})
+        if line and line[0] == '8':
+            batch_info[len(batch_info) - 1]['batch_control_line'] = line_num
+
+    data['batches'] = []
+    for batch in batch_info:
+        data['batches'].append({
+            'batch_header': parse_line(
+                lines[batch['batch_header_line']], 'BATCH_HEADER_DEF'
+            ),
+            'batch_control': parse_line(
+                lines[batch['batch_control_line']], 'BATCH_CONTROL_DEF'
+            ),
+            'entries': [],
+        })
+        for line_num in range(batch['batch_header_line'] + 1,
+                              batch['batch_control_line']):
+            line = lines[line_num]
+            if not line:
+                continue
+            cur_batch = len(data['batches']) - 1
+            entries = data['batches'][cur_batch]['entries']
+            cur_entry = len(entries) - 1
+            if line[0] == '6':
+                entries.append({
+                    'entry_detail': parse_line(line, 'ENTRY_DETAIL_DEF'),
+                    'addenda': [],
+                })
+            if line[0] == '7':
+                entries[cur_entry]['addenda'].append(
+                    parse_line(line, 'ADDENDA_RECORD_DEF')
+                )
+
+    return data
+
+
+def main():
+    print('%10s %12s %12s %8s' % ('records', 'legacy (s)', 'parser (s)', 'ratio'))
+
+    for num_batches in (10, 100, 1000):
+        ach_file = make_ach_string(num_batches, 100)
+        records = ach_file.count('\n') + 1
+
+        legacy = min(timeit.repeat(
+            lambda: legacy_parse(ach_file), number=1, repeat=5
+        ))
+        current = min(timeit.repeat(
+            lambda: Parser(ach_file), number=1, repeat=5
+        ))
+
+        print('%10d %12.4f %12.4f %8.2f' % (
+            records, legacy, current, legacy / current
+        ))
+
+
+if __name__ == '__main__':
+    main()
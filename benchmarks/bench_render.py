@@ -0,0 +1,66 @@
+"""
+Shows how AchFile.render_to_string scales with the number of entries,
+next to the nested string concatenation it replaced.
+
+    python -m benchmarks.bench_render
+"""
+import timeit
+
+from .common import make_ach_file
+
+
+def legacy_render(ach_file, line_ending='\n'):
+    """
+    The previous rendering: every level appends its children's strings to
+    its own with `+=`
+    """
+    ret_string = ach_file.header.get_row() + line_ending
+
+    for batch in ach_file.batches:
+        batch_string = batch.batch_header.get_row() + line_ending
+
+        for entry in batch.entries:
+            entry_string = entry.entry_detail.get_row() + line_ending
+            for addenda in entry.addenda_record:
+                entry_string += addenda.get_row() + line_ending
+            batch_string += entry_string
+
+        batch_string += batch.batch_control.get_row() + line_ending
+        ret_string += batch_string
+
+    ret_string += ach_file.control.get_row() + line_ending
+
+    nines = ''
+    nine_lines = ach_file.get_nine_lines()
+    for i in range(nine_lines):
+        nines += '9' * 94
+        if i == nine_lines - 1:
+            continue
+        nines += line_ending
+
+    return ret_string + nines
+
+
+def main():
+    print('%10s %12s %12s %14s' % (
+        'entries', 'legacy (s)', 'render (s)', 'us per entry'
+    ))
+
+    for num_batches in (10, 100, 1000):
+        ach_file = make_ach_file(num_batches, 100)
+        entries = num_batches * 100
+
+        legacy = min(timeit.repeat(
+            lambda: legacy_render(ach_file), number=1, repeat=3
+        ))
+        current = min(timeit.repeat(
+            ach_file.render_to_string, number=1, repeat=3
+        ))
+
+        print('%10d %12.4f %12.4f %14.2f' % (
+            entries, legacy, current, current / entries * 1e6
+        ))
+
+
+if __name__ == '__main__':
+    main()
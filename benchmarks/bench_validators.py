@@ -0,0 +1,84 @@
+"""
+Micro benchmarks for the field validators in ach.data_types, next to the
+implementations they replaced.
+
+    python -m benchmarks.bench_validators
+"""
+import re
+import timeit
+
+from ach.data_types import Ach
+
+NUMBER = 200000
+
+
+class LegacyAch(object):
+    """
+    The validators as they were before patterns and padding were cached
+    """
+
+    def make_space(self, spaces=1):
+        space_string = ''
+        for i in range(spaces):
+            space_string += ' '
+        return space_string
+
+    def make_zero(self, zeros=1):
+        zero_string = ''
+        for i in range(zeros):
+            zero_string += '0'
+        return zero_string
+
+    def validate_alpha_numeric_field(self, field, length):
+        str_length = str(length)
+        match = re.match(r'([\w,\s]{1,' + str_length + '})', field)
+        if match:
+            if len(match.group(1)) < length:
+                field = match.group(1) + self.make_space(
+                    length - len(match.group(1)))
+            else:
+                field = match.group(1)
+        return field.upper()
+
+    def validate_numeric_field(self, field, length):
+        field = str(field)
+        if field.isdigit():
+            if len(field) < length:
+                field = self.make_zero(length - len(field)) + field
+        return field
+
+
+CASES = [
+    ('make_space(22)', lambda ach: ach.make_space(22)),
+    ('make_zero(10)', lambda ach: ach.make_zero(10)),
+    ('alpha numeric, short name',
+     lambda ach: ach.validate_alpha_numeric_field('ALICE', 22)),
+    ('alpha numeric, blank field',
+     lambda ach: ach.validate_alpha_numeric_field('  ', 80)),
+    ('numeric, amount',
+     lambda ach: ach.validate_numeric_field(1000, 10)),
+    ('numeric, full width',
+     lambda ach: ach.validate_numeric_field('123456780000001', 15)),
+]
+
+
+def main():
+    legacy, current = LegacyAch(), Ach()
+
+    print('%-28s %12s %12s %8s' % ('case', 'legacy (us)', 'now (us)', 'ratio'))
+
+    for name, case in CASES:
+        before = min(timeit.repeat(
+            lambda: case(legacy), number=NUMBER, repeat=3
+        )) / NUMBER * 1e6
+        after = min(timeit.repeat(
+            lambda: case(current), number=NUMBER, repeat=3
+        )) / NUMBER * 1e6
+
+        print('%-28s %12.3f %12.3f %8.2f' % (
+            name, before, after, before / after
+        ))
+
+
+if __name__ == '__main__':
+    main()
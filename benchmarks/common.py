@@ -0,0 +1,65 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+from datetime import datetime
+
+from ach.builder import AchFile
+
+SETTINGS = {
+    'immediate_dest': '123456780',
+    'immediate_org': '123456780',
+    'immediate_dest_name': 'YOUR BANK',
+    'immediate_org_name': 'YOUR COMPANY',
+    'company_id': '1234567890',
+}
+
+
+def make_entries(count):
+    """
+    Returns `count` entry dicts in the format `AchFile.add_batch` takes,
+    every fifth one carries an addenda record
+    """
+    entries = []
+
+    for i in range(count):
+        entry = {
+            'type': '22' if i % 2 else '27',
+            'routing_number': '12345678',
+            'account_number': str(100000 + i),
+            'amount': '%d.%02d' % (i % 5000, i % 100),
+            'name': 'Customer %d' % i,
+        }
+        if i % 5 == 0:
+            entry['addenda'] = [{'payment_related_info': 'Invoice %d' % i}]
+        entries.append(entry)
+
+    return entries
+
+
+def make_ach_file(num_batches, entries_per_batch):
+    """
+    Builds an AchFile with `num_batches` PPD batches
+    """
+    ach_file = AchFile('A', SETTINGS)
+    entries = make_entries(entries_per_batch)
+
+    for _ in range(num_batches):
+        ach_file.add_batch(
+            'PPD', entries, credits=True, debits=True,
+            eff_ent_date=datetime(2020, 1, 2)
+        )
+
+    return ach_file
+
+
+def make_ach_string(num_batches, entries_per_batch):
+    """
+    Returns the text of a file with `num_batches` batches. Only one batch is
+    built, the rest are copies of its rows, so large files are cheap to make.
+    """
+    rows = make_ach_file(1, entries_per_batch).render_to_string().split('\n')
+    batch_rows = [row for row in rows if row[0] not in '19']
+
+    return '\n'.join(
+        [rows[0]] + batch_rows * num_batches + [row for row in rows if row[0] == '9']
+    )
@@ -0,0 +1,363 @@
+import io
+import os
+import tempfile
+
+import nose.tools as nt
+
+from ach.builder import AchFile, AppendAchFile
+from ach.data_types import AchError, CompactEntryDetail, EntryDetail
+
+
+class TestAchFile(object):
+    def setup(self):
+
+        self.settings = {
+            'immediate_dest' : '123456780',
+            'immediate_org' : '123456780',
+            'immediate_dest_name' : 'YOUR BANK',
+            'immediate_org_name' : 'YOUR COMPANY',
+            'company_id' : '1234567890', #tax number
+        }
+
+        self.ach_file = AchFile('A', self.settings) #file Id mod
+
+        self.entries = [
+            {
+                'type'           : '22', # type of
+                'routing_number' : '12345678',
+                'account_number' : '11232132',
+                'amount'         : '10.00',
+                'name'           : 'Alice Wanderdust',
+                'addenda' : [
+                    {
+                        'payment_related_info': 'Here is some additional information',
+                    },
+                ],
+            },
+            {
+                'type'           : '27',
+                'routing_number' : '12345678',
+                'account_number' : '234234234',
+                'amount'         : '150.00',
+                'name'           : 'Billy Holiday',
+            },
+            {
+                'type'           : '22',
+                'routing_number' : '123232318',
+                'account_number' : '123123123',
+                'amount'         : '12.13',
+                'name'           : 'Rachel Welch',
+            },
+        ]
+
+        for _ in range(5):
+            self.ach_file.add_batch(
+                'PPD', self.entries, credits=True, debits=True
+            )
+
+    def test_file_control_totals(self):
+        '''
+        The running totals must agree with a walk over all the batches
+        '''
+        batches = self.ach_file.batches
+        control = self.ach_file.control
+
+        nt.assert_equals(control.batch_count, '000005')
+        nt.assert_equals(
+            int(control.block_count), self.ach_file.get_block_count(batches)
+        )
+        nt.assert_equals(
+            int(control.entadd_count), self.ach_file.get_entadd_count(batches)
+        )
+        nt.assert_equals(
+            int(control.entry_hash),
+            int(self.ach_file.get_entry_hash(batches))
+        )
+        nt.assert_equals(
+            int(control.debit_amount), self.ach_file.get_debit_amount(batches)
+        )
+        nt.assert_equals(
+            int(control.credit_amount),
+            self.ach_file.get_credit_amount(batches)
+        )
+
+        # set_control recounts batches that were changed directly
+        batches.pop()
+        self.ach_file.set_control()
+
+        nt.assert_equals(self.ach_file.control.batch_count, '000004')
+        nt.assert_equals(
+            int(self.ach_file.control.entadd_count),
+            self.ach_file.get_entadd_count(batches)
+        )
+
+    def test_write_to(self):
+        text = io.StringIO()
+        self.ach_file.write_to(text)
+
+        nt.assert_equals(text.getvalue(), self.ach_file.render_to_string())
+
+        binary = io.BytesIO()
+        self.ach_file.write_to(binary, force_crlf=True)
+
+        nt.assert_equals(
+            binary.getvalue(),
+            self.ach_file.render_to_string(force_crlf=True).encode('ascii')
+        )
+
+    def test_stream_batch(self):
+        '''
+        A batch fed from an iterator renders the same file as a list
+        '''
+        ach_file = AchFile('A', self.settings)
+
+        for _ in range(5):
+            ach_file.add_batch(
+                'PPD', iter(self.entries), credits=True, debits=True,
+                stream=True
+            )
+
+        output = io.StringIO()
+        ach_file.write_to(output)
+
+        # Skip the file header, its creation time can differ
+        nt.assert_equals(
+            output.getvalue().split('\n')[1:],
+            self.ach_file.render_to_string().split('\n')[1:]
+        )
+        nt.assert_equals(
+            ach_file.control.get_row(), self.ach_file.control.get_row()
+        )
+        nt.assert_raises(AchError, ach_file.render_to_string)
+
+    def test_verify_routing(self):
+        '''
+        Bad check digits are reported for the whole batch, streamed or not
+        '''
+        entries = self.entries + [dict(self.entries[2])]
+        entries[3]['routing_number'] = '123232315'
+
+        try:
+            self.ach_file.add_batch('PPD', entries, verify_routing=True)
+        except AchError as error:
+            nt.assert_equals(
+                str(error), 'invalid routing number check digit in entries 2'
+            )
+        else:
+            raise AssertionError('AchError not raised')
+
+        nt.assert_equals(len(self.ach_file.batches), 5)
+
+        self.ach_file.add_batch('PPD', entries[3:], verify_routing=True)
+        self.ach_file.add_batch(
+            'PPD', iter(entries), verify_routing=True, stream=True
+        )
+
+        nt.assert_raises(AchError, self.ach_file.render_to_string)
+
+    def test_batch_context(self):
+        '''
+        Batches of one SEC code and company share a context, and entries
+        built from it match the record classes
+        '''
+        nt.assert_equals(list(self.ach_file.batch_contexts), [
+            ('PPD', '1234567890')
+        ])
+
+        headers = [batch.batch_header for batch in self.ach_file.batches]
+        nt.assert_equals(
+            [header.batch_id for header in headers],
+            ['0000001', '0000002', '0000003', '0000004', '0000005']
+        )
+
+        context = self.ach_file.get_batch_context('CIE')
+        entry = context.build_entry(self.entries[2], 12)
+
+        expected = EntryDetail(
+            'CIE', transaction_code='22', recv_dfi_id='123232318',
+            check_digit='8', dfi_acnt_num='123123123', amount=1213,
+            ind_name='RACHEL WELCH', trace_num='123456780000012'
+        )
+
+        # CIE rows cannot be rendered, they have no ind_id
+        nt.assert_equals(vars(entry), vars(expected))
+        nt.assert_equals(len(entry.ind_name), 15)
+        nt.assert_equals(len(self.ach_file.batch_contexts), 2)
+
+    def test_entry_class(self):
+        '''
+        Entries built as compact records render the same file
+        '''
+        ach_file = AchFile('A', self.settings, CompactEntryDetail)
+        columns = dict(
+            (key, [entry[key] for entry in self.entries])
+            for key in ('type', 'routing_number', 'account_number',
+                        'amount', 'name')
+        )
+
+        for _ in range(5):
+            ach_file.add_batch(
+                'PPD', self.entries, credits=True, debits=True
+            )
+
+        for each_file in (ach_file, self.ach_file):
+            each_file.add_column_batch(
+                'PPD', columns, credits=True, debits=True
+            )
+
+        entry = ach_file.batches[0].entries[0].entry_detail
+        nt.assert_true(isinstance(entry, CompactEntryDetail))
+        nt.assert_false(hasattr(entry, '__dict__'))
+
+        # Skip the file header, its creation time can differ
+        nt.assert_equals(
+            ach_file.render_to_string().split('\n')[1:],
+            self.ach_file.render_to_string().split('\n')[1:]
+        )
+
+    def test_column_batch(self):
+        '''
+        A batch given as columns renders the same rows as entry dicts
+        '''
+        entries = [
+            dict((key, value) for key, value in entry.items()
+                 if key != 'addenda')
+            for entry in self.entries
+        ]
+        columns = dict(
+            (key, [entry[key] for entry in entries]) for key in entries[0]
+        )
+
+        ach_file = AchFile('A', self.settings)
+        column_file = AchFile('A', self.settings)
+
+        for _ in range(2):
+            ach_file.add_batch('PPD', entries, credits=True, debits=True)
+            column_file.add_column_batch(
+                'PPD', columns, credits=True, debits=True
+            )
+
+        # Skip the file header, its creation time can differ
+        nt.assert_equals(
+            column_file.render_to_string().split('\n')[1:],
+            ach_file.render_to_string().split('\n')[1:]
+        )
+
+        columns['amount'] = ['1.00', 'one', '2.00']
+        columns['name'] = ['', 'Billy Holiday', 'Rachel Welch']
+
+        try:
+            column_file.add_column_batch('PPD', columns)
+        except AchError as error:
+            nt.assert_equals(str(error), 'invalid fields in entries 0, 1')
+        else:
+            raise AssertionError('AchError not raised')
+
+        del columns['name']
+        nt.assert_raises(
+            AchError, column_file.add_column_batch, 'PPD', columns
+        )
+        nt.assert_equals(len(column_file.batches), 2)
+
+    def test_append_file(self):
+        '''
+        Batches appended over several sessions, with a partial batch left
+        by a crash in between, give the same file as one AchFile
+        '''
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(path)
+
+        try:
+            append_file = AppendAchFile(path, 'A', self.settings)
+            append_file.add_batch(
+                'PPD', self.entries, credits=True, debits=True
+            )
+            append_file.close()
+
+            nt.assert_raises(
+                AchError, append_file.add_batch, 'PPD', self.entries
+            )
+
+            # A batch header and half an entry row written before a crash
+            with open(path, 'a') as ach_file:
+                ach_file.write(
+                    self.ach_file.render_to_string().split('\n')[1] + '\n'
+                    + '6' * 40
+                )
+
+            for _ in range(4):
+                append_file = AppendAchFile(path, 'A', self.settings)
+                append_file.add_batch(
+                    'PPD', iter(self.entries), credits=True, debits=True,
+                    stream=True
+                )
+                append_file.close()
+
+            # Part of a file control row written by a crash in finalize
+            with open(path, 'a') as ach_file:
+                ach_file.write('9000001')
+
+            # A file is only reopened by the same sender for the same file
+            settings = dict(self.settings, immediate_dest='987654320')
+            nt.assert_raises(AchError, AppendAchFile, path, 'A', settings)
+            nt.assert_raises(AchError, AppendAchFile, path, 'B',
+                             self.settings)
+
+            append_file = AppendAchFile(path, 'A', self.settings)
+            nt.assert_raises(AchError, append_file.render_to_string)
+            append_file.finalize()
+
+            with open(path) as ach_file:
+                output = ach_file.read()
+
+            # Skip the file header, its creation time can differ
+            nt.assert_equals(
+                output.split('\n')[1:],
+                self.ach_file.render_to_string().split('\n')[1:]
+            )
+            nt.assert_raises(AchError, AppendAchFile, path, 'A', self.settings)
+
+            # The file control row and part of the 9 fill left by a crash
+            with open(path, 'r+') as ach_file:
+                ach_file.truncate(len(output) - 100)
+
+            AppendAchFile(path, 'A', self.settings).finalize()
+
+            with open(path) as ach_file:
+                nt.assert_equals(ach_file.read(), output)
+        finally:
+            os.remove(path)
+
+    def test_render_parallel(self):
+        '''
+        Rendering in a process pool gives the same file as rendering here
+        '''
+        for processes in (1, 2):
+            ach_file = AchFile('A', self.settings)
+
+            for _ in range(2):
+                ach_file.add_batch(
+                    'PPD', self.entries, credits=True, debits=True,
+                    stream=True
+                )
+            ach_file.add_batch('PPD', self.entries, credits=True, debits=True)
+            ach_file.add_batch(
+                'PPD', iter(self.entries), credits=True, debits=True,
+                stream=True
+            )
+            ach_file.add_batch(
+                'PPD', self.entries, credits=True, debits=True, stream=True
+            )
+
+            output = ach_file.render_parallel(processes=processes)
+
+            # Skip the file header, its creation time can differ
+            nt.assert_equals(
+                output.split('\n')[1:],
+                self.ach_file.render_to_string().split('\n')[1:]
+            )
+            nt.assert_equals(
+                ach_file.control.get_row(), self.ach_file.control.get_row()
+            )
+            nt.assert_raises(AchError, ach_file.render_parallel)
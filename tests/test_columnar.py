@@ -0,0 +1,81 @@
+import nose.tools as nt
+from nose.plugins.skip import SkipTest
+
+from ach.builder import AchFile
+from ach.parser import Parser
+
+try:
+    import numpy
+    from ach.columnar import entry_columns
+except ImportError:
+    numpy = None
+
+
+class TestEntryColumns(object):
+    def setup(self):
+        if numpy is None:
+            raise SkipTest('numpy is not installed')
+
+        self.settings = {
+            'immediate_dest' : '123456780',
+            'immediate_org' : '123456780',
+            'immediate_dest_name' : 'YOUR BANK',
+            'immediate_org_name' : 'YOUR COMPANY',
+            'company_id' : '1234567890', #tax number
+        }
+
+        ach_file = AchFile('A', self.settings) #file Id mod
+
+        self.entries = [
+            {
+                'type'           : '22', # type of
+                'routing_number' : '12345678',
+                'account_number' : '11232132',
+                'amount'         : '10.00',
+                'name'           : 'Alice Wanderdust',
+                'addenda' : [
+                    {
+                        'payment_related_info': 'Here is some additional information',
+                    },
+                ],
+            },
+            {
+                'type'           : '27',
+                'routing_number' : '12345678',
+                'account_number' : '234234234',
+                'amount'         : '150.00',
+                'name'           : 'Billy Holiday',
+            },
+        ]
+
+        ach_file.add_batch('PPD', self.entries, credits=True, debits=True)
+        ach_file.add_batch('PPD', self.entries[1:], credits=True, debits=True)
+
+        self.ach_output = ach_file.render_to_string(force_crlf=True)
+
+    def test_columns(self):
+        columns = entry_columns(self.ach_output.encode('ascii'))
+
+        nt.assert_equals(columns['batch_index'].tolist(), [0, 0, 1])
+        nt.assert_equals(columns['transaction_code'].tolist(), [22, 27, 27])
+        nt.assert_equals(columns['amount'].tolist(), [1000, 15000, 15000])
+        nt.assert_equals(
+            columns['routing_number'].tolist(),
+            [b'123456780', b'123456780', b'123456780']
+        )
+        nt.assert_equals(
+            columns['trace_num'].tolist(),
+            [123456780000001, 123456780000002, 123456780000001]
+        )
+
+    def test_matches_parser(self):
+        ach_data = Parser(self.ach_output).as_dict()
+        columns = entry_columns(self.ach_output.encode('ascii'))
+
+        amounts = [
+            int(entry['entry_detail']['amount'])
+            for batch in ach_data['batches']
+            for entry in batch['entries']
+        ]
+
+        nt.assert_equals(columns['amount'].tolist(), amounts)
@@ -1,5 +1,6 @@
 import nose.tools as nt
 from ach import data_types as dt
+from ach.template import RowTemplate
 
 
 class TestDataTypes(object):
@@ -18,6 +19,12 @@ class TestDataTypes(object):
         self.entry_detail = dt.EntryDetail()
         self.addenda_record = dt.AddendaRecord()
 
+    def teardown(self):
+        '''
+        SEC codes registered by a test must not leak into the others
+        '''
+        dt.unregister_sec_code('XCK')
+
     def test_line_width(self):
         '''
         Test each record to make sure they are 94 characters wide
@@ -59,3 +66,114 @@ class TestDataTypes(object):
             self.entry_detail.recv_dfi_id + self.entry_detail.check_digit,
             '111000025'
         )
+
+    def test_compact_records(self):
+        '''
+        The __slots__ based records render the same rows and keep the same
+        validation as the regular ones
+        '''
+        compact_records = [
+            dt.CompactHeader(
+                '123456789', '123456789', 'A', 'YOUR BANK', 'YOUR COMPANY'
+            ),
+            dt.CompactFileControl(1, 1, 0, 213123123, 12300, 12300),
+            dt.CompactBatchHeader(),
+            dt.CompactBatchControl(),
+            dt.CompactEntryDetail(),
+            dt.CompactAddendaRecord(),
+        ]
+        # The headers may have been created on either side of a minute
+        compact_records[0].file_crt_date = self.header.file_crt_date
+        compact_records[0].file_crt_time = self.header.file_crt_time
+
+        records = [
+            self.header, self.file_control, self.batch_header,
+            self.batch_control, self.entry_detail, self.addenda_record,
+        ]
+
+        for compact, record in zip(compact_records, records):
+            nt.assert_false(hasattr(compact, '__dict__'))
+            nt.assert_equals(compact.get_row(), record.get_row())
+            nt.assert_raises(dt.AchError, setattr, compact,
+                             'test_property', 'testtesttest')
+
+    def test_from_fields(self):
+        '''
+        The fast constructor builds the same record as __init__ and still
+        validates the fields it is given
+        '''
+        fields = {
+            'transaction_code': '22',
+            'recv_dfi_id': '12345678',
+            'dfi_acnt_num': '11232132',
+            'amount': 1000,
+            'ind_name': 'Alice Wanderdust',
+        }
+
+        nt.assert_equals(
+            dt.EntryDetail.from_fields(fields, 'CCD').get_row(),
+            dt.EntryDetail('CCD', **fields).get_row()
+        )
+        nt.assert_equals(
+            dt.AddendaRecord.from_fields({'pmt_rel_info': 'INFO'}).get_row(),
+            dt.AddendaRecord(pmt_rel_info='INFO').get_row()
+        )
+        nt.assert_raises(dt.AchError, dt.EntryDetail.from_fields,
+                         {'amount': 'ten'}, 'PPD')
+
+    def test_register_sec_code(self):
+        '''
+        New SEC codes render with the layout they were registered with
+        '''
+        dt.register_sec_code(
+            'XCK', ['chk_serial_num', 'ind_name', 'disc_data'],
+            ['pmt_rel_info', 'add_seq_num', 'ent_det_seq_num']
+        )
+
+        batch_header = dt.BatchHeader(std_ent_cls_code='XCK')
+        entry_detail = dt.EntryDetail(
+            'XCK', recv_dfi_id='123456789', chk_serial_num='1001',
+            ind_name='ALICE'
+        )
+        rck_detail = dt.EntryDetail(
+            'RCK', recv_dfi_id='123456789', chk_serial_num='1001',
+            ind_name='ALICE'
+        )
+
+        nt.assert_equals(len(batch_header.get_row()), 94)
+        nt.assert_equals(entry_detail.get_row(), rck_detail.get_row())
+        nt.assert_equals(
+            dt.AddendaRecord('XCK').get_row(), self.addenda_record.get_row()
+        )
+
+        dt.unregister_sec_code('XCK')
+
+        nt.assert_true('XCK' not in dt.EntryDetail.std_ent_cls_code_list)
+        nt.assert_true('XCK' not in dt.EntryDetail.row_layouts)
+        nt.assert_true('XCK' not in dt.AddendaRecord.row_layouts)
+        nt.assert_raises(dt.AchError, dt.BatchHeader, std_ent_cls_code='XCK')
+
+    def test_row_template(self):
+        '''
+        Templates render the same row as the record they were made from
+        '''
+        entry_detail = dt.EntryDetail(
+            'PPD', transaction_code='22', recv_dfi_id='12345678',
+            check_digit='0', amount=1000, ind_name='ALICE',
+            trace_num='123456780000001'
+        )
+        template = RowTemplate(entry_detail, ['amount', 'trace_num'])
+
+        nt.assert_equals(template.fields, ['amount', 'trace_num'])
+        nt.assert_equals(
+            template.render(('0000001000', '123456780000001')),
+            entry_detail.get_row()
+        )
+        nt.assert_equals(
+            template.render_rows({
+                'amount': ['0000000001', '0000001000'],
+                'trace_num': ['123456780000002', '123456780000001'],
+            })[1],
+            entry_detail.get_row()
+        )
+        nt.assert_raises(ValueError, RowTemplate, entry_detail, ['ind_id'])
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+
+import nose.tools as nt
+
+from ach.builder import AchFile
+from ach.index import AchIndex
+from ach.parser import Parser
+
+
+class TestAchIndex(object):
+    def setup(self):
+
+        self.settings = {
+            'immediate_dest' : '123456780',
+            'immediate_org' : '123456780',
+            'immediate_dest_name' : 'YOUR BANK',
+            'immediate_org_name' : 'YOUR COMPANY',
+            'company_id' : '1234567890', #tax number
+        }
+
+        ach_file = AchFile('A', self.settings) #file Id mod
+
+        entries = [
+            {
+                'type'           : '22', # type of
+                'routing_number' : '12345678',
+                'account_number' : '11232132',
+                'amount'         : '10.00',
+                'name'           : 'Alice Wanderdust',
+                'addenda' : [
+                    {
+                        'payment_related_info': 'Here is some additional information',
+                    },
+                ],
+            },
+            {
+                'type'           : '27',
+                'routing_number' : '12345678',
+                'account_number' : '234234234',
+                'amount'         : '150.00',
+                'name'           : 'Billy Holiday',
+            },
+        ]
+
+        for _ in range(3):
+            ach_file.add_batch('PPD', entries, credits=True, debits=True)
+
+        self.ach_output = ach_file.render_to_string(force_crlf=True)
+        self.ach_data = Parser(self.ach_output).as_dict()
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'test.ach')
+
+        with open(self.path, 'wb') as ach_out:
+            ach_out.write(self.ach_output.encode('ascii'))
+
+    def teardown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_batches(self):
+        index = AchIndex.build(self.path)
+
+        nt.assert_equals(len(index.batches), 3)
+        nt.assert_equals(len(index.entries), 6)
+        nt.assert_equals(index.batch(1), self.ach_data['batches'][1])
+        nt.assert_equals(index.batch_by_id(3), self.ach_data['batches'][2])
+        nt.assert_raises(KeyError, index.batch_by_id, 4)
+
+    def test_find_trace(self):
+        index = AchIndex.build(self.path)
+        entry = self.ach_data['batches'][0]['entries'][0]
+
+        matches = index.find_trace(entry['entry_detail']['trace_num'])
+
+        nt.assert_equals(len(matches), 3)
+        nt.assert_equals(matches[0], entry)
+        nt.assert_equals(index.find_trace('999'), [])
+
+    def test_sidecar(self):
+        index = AchIndex.load(self.path)
+
+        nt.assert_true(os.path.exists(self.path + AchIndex.SIDECAR_SUFFIX))
+
+        with AchIndex.load(self.path) as loaded:
+            nt.assert_equals(list(loaded.batches), list(index.batches))
+            nt.assert_equals(list(loaded.entries), list(index.entries))
+            nt.assert_equals(loaded.batch(2), self.ach_data['batches'][2])
+
+        # A sidecar that is not an index is rebuilt
+        with open(self.path + AchIndex.SIDECAR_SUFFIX, 'wb') as index_file:
+            index_file.write(b'{}')
+
+        with AchIndex.load(self.path) as loaded:
+            nt.assert_equals(list(loaded.entries), list(index.entries))
+
+    def test_no_line_endings(self):
+        '''
+        Records are found by their width, line endings or not
+        '''
+        with open(self.path, 'wb') as ach_out:
+            ach_out.write(self.ach_output.replace('\r\n', '').encode('ascii'))
+
+        index = AchIndex.build(self.path)
+
+        nt.assert_equals(len(index.batches), 3)
+        nt.assert_equals(len(index.entries), 6)
+        nt.assert_equals(index.batch(1), self.ach_data['batches'][1])
+        nt.assert_equals(
+            index.entry(0), self.ach_data['batches'][0]['entries'][0]
+        )
@@ -0,0 +1,341 @@
+import io
+import json
+import os
+import tempfile
+
+import nose.tools as nt
+
+from ach.builder import AchFile
+from ach.parser import (
+    MappedParser, Parser, RecordLayout, StreamParser, parse_parallel
+)
+
+
+class TestParser(object):
+    def setup(self):
+
+        self.settings = {
+            'immediate_dest' : '123456780',
+            'immediate_org' : '123456780',
+            'immediate_dest_name' : 'YOUR BANK',
+            'immediate_org_name' : 'YOUR COMPANY',
+            'company_id' : '1234567890', #tax number
+        }
+
+        self.ach_file = AchFile('A', self.settings) #file Id mod
+
+        self.entries = [
+            {
+                'type'           : '22', # type of
+                'routing_number' : '12345678',
+                'account_number' : '11232132',
+                'amount'         : '10.00',
+                'name'           : 'Alice Wanderdust',
+                'addenda' : [
+                    {
+                        'payment_related_info': 'Here is some additional information',
+                    },
+                ],
+            },
+            {
+                'type'           : '27',
+                'routing_number' : '12345678',
+                'account_number' : '234234234',
+                'amount'         : '150.00',
+                'name'           : 'Billy Holiday',
+            },
+        ]
+
+        self.ach_file.add_batch('PPD', self.entries, credits=True, debits=True)
+        self.ach_file.add_batch('CCD', self.entries[1:], credits=True, debits=True)
+
+        self.ach_output = self.ach_file.render_to_string()
+
+    def test_as_dict(self):
+        ach_data = Parser(self.ach_output).as_dict()
+
+        nt.assert_equals(ach_data['file_header']['record_type_code'], '1')
+        nt.assert_equals(ach_data['file_control']['batch_count'], '000002')
+        nt.assert_equals(len(ach_data['batches']), 2)
+
+        entries = ach_data['batches'][0]['entries']
+        nt.assert_equals(len(entries), 2)
+        nt.assert_equals(entries[0]['entry_detail']['amount'], '0000001000')
+        nt.assert_equals(len(entries[0]['addenda']), 1)
+        nt.assert_equals(entries[1]['addenda'], [])
+
+    def test_stream_events(self):
+        events = [event for event, data in StreamParser(self.ach_output)]
+
+        nt.assert_equals(events, [
+            'file_header',
+            'batch_header', 'entry', 'entry', 'batch_control',
+            'batch_header', 'entry', 'batch_control',
+            'file_control',
+        ])
+
+    def test_file_objects(self):
+        expected = Parser(self.ach_output).as_dict()
+        crlf_output = self.ach_file.render_to_string(force_crlf=True)
+
+        nt.assert_equals(
+            Parser(io.StringIO(self.ach_output)).as_dict(), expected
+        )
+        nt.assert_equals(
+            Parser(io.BytesIO(crlf_output.encode('ascii'))).as_dict(),
+            expected
+        )
+        nt.assert_equals(
+            Parser(iter(self.ach_output.splitlines())).as_dict(), expected
+        )
+
+    def test_record_layout(self):
+        line = self.ach_output.split('\n')[2]
+        layout = RecordLayout(Parser.ENTRY_DETAIL_DEF)
+
+        expected = dict(
+            (rule['field'], line[rule['pos']:rule['pos'] + rule['len']])
+            for rule in Parser.ENTRY_DETAIL_DEF
+        )
+
+        nt.assert_equals(layout.parse(line), expected)
+        nt.assert_equals(
+            layout.extract(line),
+            tuple(expected[field] for field in layout.fields)
+        )
+
+    def test_lazy_views(self):
+        expected = Parser(self.ach_output).as_dict()
+        parser = Parser(self.ach_output, lazy=True)
+        ach_data = parser.as_dict()
+
+        entry_detail = ach_data['batches'][0]['entries'][0]['entry_detail']
+
+        nt.assert_equals(entry_detail.amount, '0000001000')
+        nt.assert_equals(entry_detail['trace_num'], '123456780000001')
+        nt.assert_raises(KeyError, entry_detail.__getitem__, 'test_property')
+        nt.assert_equals(ach_data, expected)
+        nt.assert_equals(parser.as_json(), Parser(self.ach_output).as_json())
+
+    def test_mapped_parser(self):
+        expected = Parser(self.ach_output).as_dict()
+
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as ach_file:
+                ach_file.write(self.ach_output.encode('ascii'))
+
+            with MappedParser(path) as mapped:
+                nt.assert_equals(len(mapped), 10)
+                nt.assert_equals(bytes(mapped.record(1))[:1], b'5')
+                nt.assert_equals(mapped.record_type(-1), '9')
+                nt.assert_equals(mapped.view(-1), expected['file_control'])
+                nt.assert_raises(IndexError, mapped.record_type, 10)
+                nt.assert_raises(IndexError, mapped.view, -11)
+                nt.assert_equals(
+                    mapped.file_header(), expected['file_header']
+                )
+                nt.assert_equals(
+                    mapped.file_control(), expected['file_control']
+                )
+                nt.assert_equals(mapped.batch(1), expected['batches'][1])
+                nt.assert_equals(
+                    list(mapped.iter_batches()), expected['batches']
+                )
+                nt.assert_raises(IndexError, mapped.batch, 2)
+        finally:
+            os.remove(path)
+
+    def test_empty_file(self):
+        '''
+        An empty file has no records, like an empty string given to Parser
+        '''
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+
+        try:
+            with MappedParser(path) as mapped:
+                nt.assert_equals(len(mapped), 0)
+                nt.assert_equals(mapped.file_control(), None)
+                nt.assert_equals(list(mapped.iter_batches()), [])
+                nt.assert_raises(IndexError, mapped.record, 0)
+
+            nt.assert_equals(parse_parallel(path, processes=1),
+                             {'batches': []})
+            nt.assert_equals(parse_parallel(path, processes=1),
+                             Parser('').as_dict())
+        finally:
+            os.remove(path)
+
+    def test_parse_parallel(self):
+        expected = Parser(self.ach_output).as_dict()
+
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as ach_file:
+                ach_file.write(self.ach_output.encode('ascii'))
+
+            nt.assert_equals(parse_parallel(path, processes=2), expected)
+            nt.assert_equals(parse_parallel(path, processes=1), expected)
+
+            # Cut off after the last batch control, without a file control
+            truncated = '\n'.join(self.ach_output.split('\n')[:9])
+            expected = Parser(truncated).as_dict()
+
+            with open(path, 'wb') as ach_file:
+                ach_file.write(truncated.encode('ascii'))
+
+            nt.assert_true('file_control' not in expected)
+            nt.assert_equals(parse_parallel(path, processes=1), expected)
+        finally:
+            os.remove(path)
+
+    def test_write_ndjson(self):
+        ndjson = io.StringIO()
+        count = StreamParser(self.ach_output).write_ndjson(ndjson)
+
+        lines = ndjson.getvalue().splitlines()
+        nt.assert_equals(count, 3)
+        nt.assert_equals(len(lines), 3)
+
+        last = json.loads(lines[-1])
+        nt.assert_equals(last['batch_index'], 1)
+        nt.assert_equals(last['batch_header']['std_ent_cls_code'], 'CCD')
+        nt.assert_equals(last['entry_detail']['amount'], '0000015000')
+
+        encoded = io.BytesIO()
+        StreamParser(self.ach_output, lazy=True).write_ndjson(
+            encoded, encoder=lambda data: json.dumps(data, default=dict)
+        )
+        nt.assert_equals(
+            [json.loads(line) for line in encoded.getvalue().splitlines()],
+            [json.loads(line) for line in lines]
+        )
+
+    def test_binary(self):
+        '''
+        In binary mode every field is the ASCII bytes of the str field
+        '''
+        expected = Parser(self.ach_output).as_dict()
+        data = self.ach_file.render_to_bytes()
+
+        nt.assert_equals(data, self.ach_output.encode('ascii'))
+
+        for source in (data, io.BytesIO(data), self.ach_output):
+            parser = Parser(source, binary=True)
+            ach_data = parser.as_dict()
+
+            entry_detail = ach_data['batches'][0]['entries'][0]['entry_detail']
+            nt.assert_equals(entry_detail['amount'], b'0000001000')
+            nt.assert_equals(
+                json.loads(parser.as_json()), json.loads(json.dumps(expected))
+            )
+
+        lazy = Parser(data, lazy=True, binary=True).as_dict()
+        nt.assert_equals(
+            lazy['batches'][1]['entries'][0]['entry_detail'].amount,
+            b'0000015000'
+        )
+
+    def test_validate(self):
+        '''
+        Control totals that do not match the records are reported
+        '''
+        for lazy, binary in ((False, False), (True, False), (False, True)):
+            nt.assert_equals(
+                Parser(self.ach_output, lazy=lazy, binary=binary,
+                       validate=True).errors,
+                []
+            )
+
+        lines = self.ach_output.split('\n')
+        # The second batch's control 1 cent off, the file control agrees
+        lines[8] = lines[8][:20] + '000000015001' + lines[8][32:]
+        lines[9] = lines[9][:31] + '000000030001' + lines[9][43:]
+        # A non numeric amount in the first batch
+        lines[2] = lines[2][:29] + '00000010x0' + lines[2][39:]
+
+        parser = Parser('\n'.join(lines), validate=True)
+
+        nt.assert_equals(parser.errors, [
+            {
+                'record': 'entry_detail', 'batch_index': 0,
+                'field': 'amount', 'expected': None, 'found': '00000010x0',
+            },
+            {
+                'record': 'batch_control', 'batch_index': 0,
+                'field': 'credit_amount', 'expected': '000000000000',
+                'found': '000000001000',
+            },
+            {
+                'record': 'batch_control', 'batch_index': 1,
+                'field': 'debit_amount', 'expected': '000000015000',
+                'found': '000000015001',
+            },
+        ])
+
+        # A file control that disagrees with the batch controls
+        lines[9] = lines[9][:31] + '000000030000' + lines[9][43:]
+
+        nt.assert_equals(
+            Parser('\n'.join(lines), validate=True).errors[-1],
+            {
+                'record': 'file_control', 'batch_index': None,
+                'field': 'debit_amount', 'expected': '000000030001',
+                'found': '000000030000',
+            }
+        )
+
+    def test_validate_transaction_codes(self):
+        '''
+        Credits and debits are told apart by the last digit of any
+        transaction code, returns included
+        '''
+        lines = self.ach_output.split('\n')
+        # Returns of the credit and the debits
+        lines[2] = lines[2][:1] + '21' + lines[2][3:]
+        lines[4] = lines[4][:1] + '26' + lines[4][3:]
+        lines[7] = lines[7][:1] + '26' + lines[7][3:]
+
+        nt.assert_equals(
+            Parser('\n'.join(lines), validate=True).errors, []
+        )
+
+    def test_validate_missing_records(self):
+        '''
+        A batch without a batch control and a file without a file control
+        are reported
+        '''
+        lines = self.ach_output.split('\n')
+
+        nt.assert_equals(
+            Parser('\n'.join(lines[:9]), validate=True).errors,
+            [{
+                'record': 'file_control', 'batch_index': None,
+                'field': 'record_type_code', 'expected': '9', 'found': None,
+            }]
+        )
+
+        missing_batch_control = {
+            'record': 'batch_control', 'batch_index': 0,
+            'field': 'record_type_code', 'expected': '8', 'found': None,
+        }
+
+        # The first batch control is gone, the file control disagrees too
+        errors = Parser(
+            '\n'.join(lines[:5] + lines[6:]), validate=True
+        ).errors
+        nt.assert_equals(errors[0], missing_batch_control)
+        nt.assert_equals(
+            [error['record'] for error in errors[1:]],
+            ['file_control'] * len(errors[1:])
+        )
+
+        # Cut off inside the first batch
+        nt.assert_equals(
+            Parser('\n'.join(lines[:4]), validate=True).errors,
+            [missing_batch_control, {
+                'record': 'file_control', 'batch_index': None,
+                'field': 'record_type_code', 'expected': '9', 'found': None,
+            }]
+        )
@@ -0,0 +1,67 @@
+import nose.tools as nt
+from nose.plugins.skip import SkipTest
+
+from ach import data_types as dt
+from ach.routing import check_digit, check_digits, verify_routing_numbers
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestRouting(object):
+
+    def setup(self):
+        '''
+        Routing numbers with and without check digits
+        '''
+        self.routing_numbers = [
+            '11100002', '111000025', '12345678', '123232318', '1234x678',
+            '011000015', '1',
+        ]
+
+    def test_check_digit(self):
+        '''
+        The lookup tables agree with EntryDetail.calc_check_digit
+        '''
+        entry_detail = dt.EntryDetail()
+
+        for routing_number in ('11100002', '12345678', '01100001', '1'):
+            entry_detail.recv_dfi_id = routing_number
+            entry_detail.calc_check_digit()
+
+            nt.assert_equals(
+                check_digit(routing_number), entry_detail.check_digit
+            )
+
+        nt.assert_raises(dt.AchError, check_digit, '1234x678')
+
+    def test_columns(self):
+        digits, errors = check_digits(self.routing_numbers)
+
+        nt.assert_equals(digits, ['5', '5', '0', '5', None, '5', '3'])
+        nt.assert_equals(errors, [4])
+        nt.assert_equals(
+            verify_routing_numbers(self.routing_numbers), [0, 2, 3, 4, 6]
+        )
+
+    def test_numpy_columns(self):
+        '''
+        NumPy arrays give the same results as lists
+        '''
+        if numpy is None:
+            raise SkipTest('numpy is not installed')
+
+        for routing_numbers in (numpy.array(self.routing_numbers),
+                                numpy.array(self.routing_numbers, dtype='S')):
+            digits, errors = check_digits(routing_numbers)
+
+            nt.assert_equals(errors, [4])
+            nt.assert_equals(
+                [digit for index, digit in enumerate(digits) if index != 4],
+                ['5', '5', '0', '5', '5', '3']
+            )
+            nt.assert_equals(
+                verify_routing_numbers(routing_numbers), [0, 2, 3, 4, 6]
+            )
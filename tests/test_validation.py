@@ -0,0 +1,101 @@
+import nose.tools as nt
+from nose.plugins.skip import SkipTest
+
+from ach import data_types as dt
+from ach.validation import (
+    ENTRY_FIELDS, failed_rows, numeric_column, validate_entry_columns
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+ENTRY_KEYS = dict((field, key) for key, field in ENTRY_FIELDS)
+
+
+class TestValidation(object):
+
+    def setup(self):
+        '''
+        Columns of one valid and one invalid value per field
+        '''
+        self.columns = {
+            'type': ['22', '2x7', '27'],
+            'routing_number': ['12345678', '123456789', '1234567890'],
+            'account_number': ['11232132', '234234234', '!bad'],
+            'amount': ['10.00', '150.00', 'ten'],
+            'name': ['Alice Wanderdust', '', 'Billy Holiday'],
+        }
+
+    def test_matches_records(self):
+        '''
+        Every valid value is padded the same as the EntryDetail field
+        '''
+        fields, errors = validate_entry_columns(self.columns)
+        entry = dt.EntryDetail()
+
+        for field, values in fields.items():
+            for index, value in enumerate(values):
+                if index in errors.get(field, []):
+                    continue
+
+                if field == 'amount':
+                    expected = int(round(float(
+                        self.columns['amount'][index]) * 100))
+                else:
+                    key = ENTRY_KEYS[field]
+                    expected = self.columns[key][index]
+
+                setattr(entry, field, expected)
+                nt.assert_equals(value, getattr(entry, field))
+
+    def test_all_errors_reported(self):
+        '''
+        Every failing row is reported, not just the first
+        '''
+        fields, errors = validate_entry_columns(self.columns)
+
+        nt.assert_equals(errors, {
+            'transaction_code': [1],
+            'recv_dfi_id': [2],
+            'dfi_acnt_num': [2],
+            'amount': [2],
+            'ind_name': [1],
+        })
+        nt.assert_equals(failed_rows(errors), [1, 2])
+        nt.assert_equals(fields['amount'][:2], ['0000001000', '0000015000'])
+
+    def test_numpy_columns(self):
+        '''
+        NumPy arrays give the same results as lists
+        '''
+        if numpy is None:
+            raise SkipTest('numpy is not installed')
+
+        fields, errors = validate_entry_columns(self.columns)
+        array_fields, array_errors = validate_entry_columns(dict(
+            (key, numpy.array(column))
+            for key, column in self.columns.items()
+        ))
+
+        nt.assert_equals(array_errors, errors)
+
+        for field, values in fields.items():
+            nt.assert_equals(
+                [value for index, value in enumerate(array_fields[field])
+                 if index not in errors.get(field, [])],
+                [value for value in values if value is not None]
+            )
+
+        padded, errors = numeric_column(numpy.array([5, -1, 123]), 2)
+        nt.assert_equals(list(padded[[0]]), ['05'])
+        nt.assert_equals(errors, [1, 2])
+
+        padded, errors = validate_entry_columns(
+            {'amount': numpy.array([10.0, 150.0, numpy.nan])}
+        )
+        nt.assert_equals(list(padded['amount'][:2]),
+                         ['0000001000', '0000015000'])
+        nt.assert_equals(errors, {'amount': [2]})